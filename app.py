@@ -3,15 +3,22 @@ import json
 import logging
 import re
 from typing import Dict, List, Optional
-from flask import Flask, render_template, request, flash, redirect, url_for, send_file, session 
+from flask import Flask, render_template, request, flash, redirect, url_for, send_file, session, jsonify
 from werkzeug.utils import secure_filename
 from langchain_core.prompts import PromptTemplate
-from langchain_ollama import OllamaLLM
-from resume_scraper.resume_praser import parse_resume_from_file, generate_resume_summary, infer_career_interests # ADDED infer_career_interests
-from resume_scraper.scraper import scrape_job_links_from_search_page, scrape_detailed_job_description
+from resume_scraper import llm_client
+from resume_scraper.circuit_breaker import CircuitOpenError
+from resume_scraper.match_cards import match_card_json
+from resume_scraper.metrics import runtime_metrics
+from resume_scraper.lexical_ranking import job_fit_for_score, rank_jobs_lexically, shortlist_jobs
+from resume_scraper.quotas import LLM_MATCH_CANDIDATES, MATCH_REASONING_TOP_N, get_quota_manager, match_cost, user_context
+from resume_scraper.resume_digest import build_resume_digest, resume_digest_json
+from resume_scraper.skills import combine_match_score, extract_skills, merge_skills, ontology_coverage_sufficient, skill_overlap
+from resume_scraper.resume_praser import parse_resume_from_file, generate_summary_and_interests
+from resume_scraper.scraper import fetch_job_descriptions, iter_job_cards
 import io
-import time
 import urllib.parse
+import uuid
 from dotenv import load_dotenv
 
 # For PDF generation
@@ -38,13 +45,18 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'doc', 'rtf'}
 
 class ResumeJobMatcher:
-    def __init__(self, model_name="llama3.2"):
-        try:
-            self.llm = OllamaLLM(model=model_name)
-            logger.info(f"Initialized LLM model: {model_name}")
-        except Exception as e:
-            logger.error(f"Failed to initialize LLM model: {e}")
-            raise
+    def __init__(self, model_name: Optional[str] = None, user_id: Optional[str] = None):
+        # By default every task uses its own model from llm_client.TASK_ROUTES;
+        # passing model_name pins all tasks to that single model.
+        self.model_name = model_name
+        # Client the LLM calls are made for (fair queuing between concurrent users)
+        self.user_id = user_id
+        logger.info(f"Initialized matcher with model routing: {model_name or 'per-task'}")
+
+    def _invoke_llm(self, task: str, prompt: str, validate=None) -> str:
+        """Invokes the model routed for task through the shared response cache."""
+        with user_context(self.user_id):
+            return llm_client.invoke(task, prompt, validate=validate, model=self.model_name)
 
     # Modified scrape_job_listings to use inferred interests
     def scrape_job_listings(self, cities: List[str], inferred_keywords: List[str]) -> List[Dict]:
@@ -54,7 +66,6 @@ class ResumeJobMatcher:
         all_job_listings = []
         seen_job_urls = set()
         max_retries = 3
-        retry_delay = 5
 
         base_linkedin_search_url = "https://www.linkedin.com/jobs/search/?"
         search_params = {
@@ -82,49 +93,53 @@ class ResumeJobMatcher:
                         search_url = base_linkedin_search_url + "&".join(param_strings)
                         
                         logger.info(f"Attempt {attempt + 1}/{max_retries}: Scraping jobs for '{keyword}' in '{city}'")
-                        initial_job_cards = scrape_job_links_from_search_page(search_url)
-                        
-                        if initial_job_cards:  # Only process if we got results
-                            logger.info(f"Found {len(initial_job_cards)} initial job cards")
-                            
-                            for card in initial_job_cards:
+                        cards_to_fetch = {}
+                        cards_found = 0
+
+                        def new_job_urls():
+                            nonlocal cards_found
+                            for card in iter_job_cards(search_url):
+                                cards_found += 1
                                 job_url = card.get('url')
                                 if not job_url or job_url in seen_job_urls:
                                     continue
-                                
                                 seen_job_urls.add(job_url)
-                                detailed_description = None
-                                
-                                # Retry logic for detailed description
-                                for desc_attempt in range(max_retries):
-                                    try:
-                                        detailed_description = scrape_detailed_job_description(job_url)
-                                        if detailed_description:
-                                            break
-                                    except Exception as e:
-                                        logger.warning(f"Attempt {desc_attempt + 1} failed for {job_url}: {e}")
-                                        if desc_attempt < max_retries - 1:
-                                            time.sleep(retry_delay)
-                                
-                                if detailed_description:
-                                    job_listing_details = self._extract_job_details(detailed_description)
-                                    if job_listing_details:
-                                        job_listing_details.update({
-                                            'job_url': job_url,
-                                            'job_title': job_listing_details.get('job_title') or card.get('title'),
-                                            'company': job_listing_details.get('company') or card.get('company'),
-                                            'location': job_listing_details.get('location') or card.get('location')
-                                        })
-                                        all_job_listings.append(job_listing_details)
-                            
+                                cards_to_fetch[job_url] = card
+                                yield job_url
+
+                        # Cards stream in from the search pages; each description is fetched as soon
+                        # as its card arrives and extracted as the fetches complete
+                        for job_url, detailed_description in fetch_job_descriptions(new_job_urls()):
+                            if not detailed_description:
+                                logger.warning(f"Could not fetch job description for {job_url}")
+                                continue
+                            card = cards_to_fetch[job_url]
+                            job_listing_details = self._extract_job_details(detailed_description)
+                            if not job_listing_details and not llm_client.ollama_available():
+                                # Ollama is down: keep the raw posting so it can still be ranked lexically
+                                job_listing_details = {
+                                    'requirements': [],
+                                    'skills_required': extract_skills(detailed_description),
+                                    'job_description': detailed_description
+                                }
+                            if job_listing_details:
+                                job_listing_details.update({
+                                    'job_url': job_url,
+                                    'job_title': job_listing_details.get('job_title') or card.get('title'),
+                                    'company': job_listing_details.get('company') or card.get('company'),
+                                    'location': job_listing_details.get('location') or card.get('location')
+                                })
+                                job_listing_details['match_card'] = match_card_json(job_listing_details)
+                                all_job_listings.append(job_listing_details)
+
+                        if cards_found:  # Only retry if the search returned nothing
+                            logger.info(f"Found {cards_found} job cards for '{keyword}' in '{city}'")
                             # If we successfully got jobs, break the retry loop
                             break
                         
                     except Exception as e:
+                        # Retries are paced by the politeness scheduler's per-host backoff
                         logger.error(f"Error during job scraping for {keyword} in {city}: {e}")
-                        if attempt < max_retries - 1:
-                            logger.info(f"Retrying in {retry_delay} seconds...")
-                            time.sleep(retry_delay)
                         continue
 
         logger.info(f"Total unique detailed job listings extracted: {len(all_job_listings)}")
@@ -135,8 +150,16 @@ class ResumeJobMatcher:
         """
         Extracts structured job details from a *full job description content*.
         """
+        # Skills come from the local skill ontology; the LLM is asked for them too unless the
+        # ontology found enough role-specific ones, and its answer is merged with the hits
+        ontology_skills = extract_skills(detailed_job_content)
+        ask_llm_for_skills = not ontology_coverage_sufficient(ontology_skills)
+        skills_field = '\n    "skills_required": [],' if ask_llm_for_skills else ""
+        skills_instruction = "" if not ask_llm_for_skills else (
+            '\n- For "skills_required", extract ALL explicitly mentioned skills or tools (e.g., "Python", "SQL", "AWS", "Jira", "Communication"). If implied, infer likely skills based on the job title.'
+        )
         job_extract_prompt = PromptTemplate(
-            input_variables=["job_content"],
+            input_variables=["job_content", "skills_field", "skills_instruction"],
             template="""Extract structured job details from the following full job posting content and return ONLY a valid JSON object. Do not include any explanatory text, code block markers (e.g., ```json), or other content outside the JSON object. Ensure all strings are properly escaped and valid for JSON.
 
 Full Job Posting Content:
@@ -147,27 +170,38 @@ Return a JSON object with the following structure:
     "job_title": "",
     "company": "",
     "location": "",
-    "requirements": [],
-    "skills_required": [],
+    "requirements": [],{skills_field}
     "experience_level": "",
     "job_description": ""
 }}
 
 Instructions:
 - Identify the job title, company, and location from the content.
-- For "requirements", extract ALL explicitly mentioned qualifications, experience, or prerequisites (e.g., "3 years of experience", "Bachelor's degree in Computer Science", "Must have a valid driving license"). If implied, infer reasonable ones based on the role.
-- For "skills_required", extract ALL explicitly mentioned skills or tools (e.g., "Python", "SQL", "AWS", "Jira", "Communication"). If implied, infer likely skills based on the job title.
+- For "requirements", extract ALL explicitly mentioned qualifications, experience, or prerequisites (e.g., "3 years of experience", "Bachelor's degree in Computer Science", "Must have a valid driving license"). If implied, infer reasonable ones based on the role.{skills_instruction}
 - For "experience_level", determine if the job is "Entry Level", "Mid Level", "Senior Level", "Director Level", "Executive Level", or leave empty if not specified/inferrable.
 - For "job_description", summarize the job's responsibilities or description comprehensively.
 - If information is not explicitly found, make reasonable inferences or use empty strings/lists as appropriate.
 - If the Company name or location is empty, try to infer or leave empty.
 - Prioritize explicit mentions over inferences.
-- Ensure the "requirements" and "skills_required" lists are comprehensive.
+- Ensure the "requirements" list is comprehensive.
 """
         )
         try:
-            response = self.llm.invoke(job_extract_prompt.format(job_content=detailed_job_content))
+            response = self._invoke_llm(
+                "job_extraction",
+                job_extract_prompt.format(
+                    job_content=detailed_job_content,
+                    skills_field=skills_field,
+                    skills_instruction=skills_instruction
+                ),
+                validate=lambda r: bool(self._clean_json_response(r, expect_array=False))
+            )
             job_details = self._clean_json_response(response, expect_array=False)
+            if isinstance(job_details, dict):
+                llm_skills = job_details.get("skills_required") if ask_llm_for_skills else None
+                job_details["skills_required"] = merge_skills(
+                    ontology_skills, llm_skills if isinstance(llm_skills, list) else []
+                )
             return job_details
         except Exception as e:
             logger.error(f"Error extracting job details with LLM: {e}")
@@ -196,7 +230,7 @@ Instructions:
             logger.error(f"Raw LLM Response: {response}")
             return [] if expect_array else {}
 
-        json_str = matches  # Take the first match
+        json_str = matches[0]  # Take the first match
 
         # Attempt to fix incomplete JSON (simple balancing for braces/brackets)
         try:
@@ -258,7 +292,11 @@ Instructions:
 
         )
         try:
-            response = self.llm.invoke(keyword_prompt.format(resume_data=json.dumps(resume_data)))
+            response = self._invoke_llm(
+                "keyword_extraction",
+                keyword_prompt.format(resume_data=json.dumps(resume_data)),
+                validate=lambda r: bool(self._clean_json_response(r, expect_array=True))
+            )
             response_data = self._clean_json_response(response, expect_array=True)
             if isinstance(response_data, list):
                 return response_data
@@ -269,18 +307,28 @@ Instructions:
             logger.error(f"Error extracting resume keywords with LLM: {e}")
             return resume_data.get("Technical Skills", []) + resume_data.get("Soft Skills", []) # Fallback
 
-    def match_resume_to_jobs(self, resume_data: Dict, job_listings: List[Dict]) -> List[Dict]:
+    def match_resume_to_jobs(self, resume_data: Dict, job_listings: List[Dict], reasoning_top_n: int = 5) -> List[Dict]:
+        if not llm_client.ollama_available():
+            logger.warning("Ollama circuit is open; falling back to lexical ranking.")
+            return rank_jobs_lexically(resume_data, job_listings)
+
         keywords = self.extract_resume_keywords(resume_data)
         logger.info(f"Extracted keywords from resume: {keywords}")
 
-        # Try to infer a primary job title from the resume for better matching context
-        primary_job_title = resume_data.get("Work Experience", [{}]).get("Position") \
-                           or resume_data.get("Projects", [{}]).get("Name") \
-                           or resume_data.get("Full Name", "").split()[-1] + " (inferred)" # last word of name as potential role
+        # Built once per upload and reused in every job prompt instead of the full resume JSON
+        digest = build_resume_digest(resume_data, keywords)
+        resume_details = resume_digest_json(digest)
+        logger.info(f"Resume digest {digest['digest_hash']}: {len(resume_details)} chars")
 
-        matching_prompt = PromptTemplate(
+        # Most recent position listed on the resume gives the matcher its role context
+        titles = digest.get("titles") or []
+        primary_job_title = titles[0] if titles else "Not specified"
+
+        # Phase one: score every job. Only the score and skill lists are generated here;
+        # the long match_reasoning is written afterwards, for the displayed jobs only.
+        scoring_prompt = PromptTemplate(
             input_variables=["resume_details", "job_listing", "keywords", "primary_job_title"],
-            template="""Compare the provided resume details with a job listing and return ONLY a valid JSON object. Do not include any explanatory text or code block markers. Ensure all strings are properly escaped and valid for JSON. The match_score must be an integer between 0 and 100.
+            template="""Compare the provided resume details with a job listing and return ONLY a valid JSON object. Do not include any explanatory text or code block markers. Ensure all strings are properly escaped and valid for JSON. Both scores must be integers between 0 and 100.
 
 Resume Details:
 {resume_details}
@@ -293,89 +341,141 @@ Inferred Primary Job Title from Resume: {primary_job_title}
 
 Return:
 {{
-    "match_score": 0,
-    "matched_skills": [],
-    "missing_skills": [],
-    "match_reasoning": "",
-    "job_fit": ""
+    "experience_alignment": 0,
+    "requirement_fit": 0
 }}
 
-Evaluation Criteria:
-- Calculate match_score (0-100) based on:
-  - Skill overlap: How many job's required skills match resume keywords and parsed skills (40% weight).
-  - Experience alignment: If resume's work experience and total years of experience (if inferrable) align with job's experience_level and requirements (30% weight).
-  - Requirement fit: How well the resume's qualifications, education, and other sections meet the job's stated requirements (30% weight).
-- List 'matched_skills' as specific skills from job.skills_required that are clearly present in the resume keywords or parsed resume details.
-- List 'missing_skills' as specific skills from job.skills_required that are NOT found in the resume.
-- Provide detailed 'match_reasoning' explaining the calculated score, highlighting key strengths and weaknesses based on the resume. Be constructive in suggesting improvements for missing skills.
-- Set 'job_fit' to "Excellent Match" (80-100), "Good Match" (60-79), "Moderate Match" (40-59), or "Poor Match" (0-39).
-- If data is insufficient, infer reasonable values and explain in match_reasoning.
-- Make sure 'matched_skills' and 'missing_skills' are distinct lists of actual skills mentioned.
+Evaluation Criteria (skill overlap is computed separately; do not score skills):
+- experience_alignment (0-100): How well the resume's work experience and total years of experience (if inferrable) align with the job's experience_level and requirements.
+- requirement_fit (0-100): How well the resume's qualifications, education, and other sections meet the job's stated requirements.
+- If data is insufficient, infer reasonable values.
 """
         )
+        candidate_skills = set(digest.get("skills", []))
         matched_jobs = []
+        lexical_rest = []  # jobs left unscored when Ollama goes down; ranked on their own scale
         total_jobs = len(job_listings)
         for i, job in enumerate(job_listings, 1):
             try:
-                logger.info(f"Matching job {i}/{total_jobs}: {job.get('job_title', 'Unknown Job')} at {job.get('company', 'Unknown Company')}")
-                match_result = self.llm.invoke(
-                    matching_prompt.format(
-                        resume_details=json.dumps(resume_data),
-                        job_listing=json.dumps(job),
+                logger.info(f"Scoring job {i}/{total_jobs}: {job.get('job_title', 'Unknown Job')} at {job.get('company', 'Unknown Company')}")
+                match_result = self._invoke_llm(
+                    "match_scoring",
+                    scoring_prompt.format(
+                        resume_details=resume_details,
+                        job_listing=match_card_json(job),
                         keywords=", ".join(keywords),
                         primary_job_title=primary_job_title
-                    )
+                    ),
+                    validate=lambda r: "experience_alignment" in self._clean_json_response(r, expect_array=False)
                 )
-                match_data = self._clean_json_response(match_result, expect_array=False)
+                fit_data = self._clean_json_response(match_result, expect_array=False)
                 
-                if not match_data or "match_score" not in match_data:
+                if not fit_data or "experience_alignment" not in fit_data:
                     logger.warning(f"Invalid match data for job {i}: {job.get('job_title')}, skipping.")
                     continue
 
-                # Ensure match_score is an integer and within range
-                try:
-                    match_score = int(match_data.get("match_score", 0))
-                except ValueError:
-                    match_score = 0 # Default to 0 if conversion fails
-                
-                match_data["match_score"] = max(0, min(100, match_score)) # Clamp between 0 and 100
-
-                # Fallback and consistency check for match_score and job_fit
-                if not isinstance(match_data["match_score"], int): # Re-check after conversion attempt
-                    match_data["match_score"] = 0 
-
-                # Update job_fit based on adjusted match_score
-                if match_data["match_score"] >= 80:
-                    match_data["job_fit"] = "Excellent Match"
-                elif match_data["match_score"] >= 60:
-                    match_data["job_fit"] = "Good Match"
-                elif match_data["match_score"] >= 40:
-                    match_data["job_fit"] = "Moderate Match"
-                else:
-                    match_data["job_fit"] = "Poor Match"
-
-                # Ensure match_reasoning is populated
-                if not match_data.get("match_reasoning"):
-                    matched_skills_count = len(match_data.get("matched_skills", []))
-                    missing_skills_count = len(match_data.get("missing_skills", []))
-                    job_skills_count = len(job.get("skills_required", []))
-                    match_data["match_reasoning"] = (
-                        f"Based on a {match_data['match_score']}% match: Matched {matched_skills_count} out of {job_skills_count} required skills. "
-                        f"Identified {missing_skills_count} skills for potential development. "
-                        f"Resume aligns with job experience and requirements."
-                    )
+                # Skill overlap is a set operation, done locally; the LLM only judged experience and requirements
+                matched_skills, missing_skills = skill_overlap(candidate_skills, job.get("skills_required", []))
+                match_data = {
+                    "match_score": combine_match_score(
+                        len(matched_skills),
+                        len(matched_skills) + len(missing_skills),
+                        self._score_value(fit_data.get("experience_alignment")),
+                        self._score_value(fit_data.get("requirement_fit"))
+                    ),
+                    "matched_skills": matched_skills,
+                    "missing_skills": missing_skills
+                }
+                match_data["job_fit"] = job_fit_for_score(match_data["match_score"])
+                # Placeholder until phase two; also what non-displayed jobs keep
+                match_data["match_reasoning"] = self._default_match_reasoning(match_data, job)
 
                 matched_job = {**job, "match_details": match_data}
                 matched_jobs.append(matched_job)
+            except CircuitOpenError:
+                # Ollama went down mid-run: rank the remaining jobs lexically instead of timing out on each
+                logger.warning(f"Ollama circuit opened while matching; ranking the remaining {total_jobs - i + 1} jobs lexically.")
+                lexical_rest = rank_jobs_lexically(resume_data, job_listings[i - 1:])
+                break
             except Exception as e:
                 logger.error(f"Error matching resume to job {job.get('job_title', 'Unknown Job')}: {e}")
                 # Log the job data that caused the error for debugging
                 logger.error(f"Job data causing error: {json.dumps(job, indent=2)}")
 
         matched_jobs.sort(key=lambda x: x.get('match_details', {}).get('match_score', 0), reverse=True)
+
+        # Phase two: detailed reasoning only for the jobs that will actually be shown
+        for matched_job in matched_jobs[:reasoning_top_n]:
+            self.add_match_reasoning(resume_data, matched_job, digest)
+
+        # Lexical scores aren't comparable with LLM scores, so those jobs follow the scored ones
+        matched_jobs += lexical_rest
         logger.info(f"Completed matching. Found {len(matched_jobs)} suitable jobs.")
         return matched_jobs
 
+    def _score_value(self, value) -> int:
+        """Coerces an LLM-provided 0-100 score, defaulting to 0."""
+        try:
+            return max(0, min(100, int(value)))
+        except (TypeError, ValueError):
+            return 0
+
+    def _default_match_reasoning(self, match_data: Dict, job: Dict) -> str:
+        matched_skills_count = len(match_data.get("matched_skills", []))
+        missing_skills_count = len(match_data.get("missing_skills", []))
+        job_skills_count = len(job.get("skills_required", []))
+        return (
+            f"Based on a {match_data['match_score']}% match: Matched {matched_skills_count} out of {job_skills_count} required skills. "
+            f"Identified {missing_skills_count} skills for potential development. "
+            f"Resume aligns with job experience and requirements."
+        )
+
+    def add_match_reasoning(self, resume_data: Dict, matched_job: Dict, digest: Optional[Dict] = None) -> Dict:
+        """
+        Generates the detailed match_reasoning for one already-scored job, in place.
+        Keeps the placeholder reasoning if the LLM is unavailable.
+        """
+        digest = digest or build_resume_digest(resume_data)
+        reasoning_prompt = PromptTemplate(
+            input_variables=["resume_details", "job_listing", "match_score", "matched_skills", "missing_skills"],
+            template="""A resume was scored against a job listing. Write a detailed explanation of the score in one paragraph of plain text (no JSON, no markdown), highlighting key strengths and weaknesses based on the resume. Be constructive in suggesting improvements for missing skills.
+
+Resume Details:
+{resume_details}
+
+Job Listing:
+{job_listing}
+
+Match Score: {match_score}/100
+Matched Skills: {matched_skills}
+Missing Skills: {missing_skills}
+"""
+        )
+        match_data = matched_job.get("match_details", {})
+        job = {k: v for k, v in matched_job.items() if k != "match_details"}
+        try:
+            reasoning = self._invoke_llm(
+                "match_reasoning",
+                reasoning_prompt.format(
+                    resume_details=resume_digest_json(digest),
+                    job_listing=match_card_json(job),
+                    match_score=match_data.get("match_score", 0),
+                    matched_skills=", ".join(match_data.get("matched_skills", [])) or "None",
+                    missing_skills=", ".join(match_data.get("missing_skills", [])) or "None"
+                ),
+                validate=lambda r: bool(r.strip())
+            )
+            match_data["match_reasoning"] = reasoning.replace("```", "").strip()
+        except Exception as e:
+            logger.warning(f"Could not generate match reasoning for {job.get('job_title', 'Unknown Job')}: {e}")
+        return matched_job
+
+def quota_keys() -> List[str]:
+    """Quota buckets charged for the current request: the browser session and the client IP."""
+    if 'quota_id' not in session:
+        session['quota_id'] = uuid.uuid4().hex
+    return [f"session:{session['quota_id']}", f"ip:{request.remote_addr}"]
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -416,9 +516,12 @@ def upload():
             resume_data = None
             resume_summary = None
             matched_jobs = None
+            keys = quota_keys()
+            quotas = get_quota_manager()
 
             try:
-                # Parse resume from the saved file
+                # Parse resume from the saved file (can't be degraded, so charged without a quota check)
+                quotas.consume(keys, 1)
                 with open(filepath, 'rb') as resume_file_for_parsing:
                     resume_data = parse_resume_from_file(resume_file_for_parsing)
 
@@ -430,16 +533,22 @@ def upload():
                 # Store resume_data in session for PDF download
                 session['parsed_resume_data'] = resume_data 
 
-                # Generate resume summary
-                resume_summary = generate_resume_summary(resume_data)
+                # Generate the resume summary and infer career interests from the full resume
+                # data; both Gemini calls run at the same time
+                resume_summary, inferred_job_keywords = generate_summary_and_interests(
+                    resume_data,
+                    summary=quotas.try_consume(keys, 1),
+                    interests=quotas.try_consume(keys, 1)
+                )
                 if not resume_summary:
                     flash("Could not generate resume summary.", 'warning')
                     logger.warning("Failed to generate resume summary.")
 
-                matcher = ResumeJobMatcher(model_name="llama3.2")
-                
-                # Dynamically infer career interests from the full resume data
-                inferred_job_keywords = infer_career_interests(resume_data)
+                matcher = ResumeJobMatcher(user_id=keys[0])
+
+                if inferred_job_keywords is None:
+                    # Over quota: search with the resume's own top skills
+                    inferred_job_keywords = (resume_data.get("Technical Skills") or [])[:3]
                 if not inferred_job_keywords:
                     flash("Could not infer specific job interests from your resume. Searching with general terms.", 'info')
                     inferred_job_keywords = ["general"] # Fallback if LLM fails to infer anything
@@ -453,7 +562,15 @@ def upload():
                     # Still show resume data if successfully parsed
                     return render_template('upload.html', resume_data=resume_data, resume_summary=resume_summary)
 
-                matched_jobs = matcher.match_resume_to_jobs(resume_data, job_listings)
+                # Only the best lexical matches are scored by the LLM; the others follow them in
+                # lexical order. Over quota: degrade to lexical ranking instead of rejecting the upload
+                candidates, lexical_rest = shortlist_jobs(resume_data, job_listings, LLM_MATCH_CANDIDATES)
+                if quotas.try_consume(keys, match_cost(len(candidates))):
+                    matched_jobs = matcher.match_resume_to_jobs(resume_data, candidates, reasoning_top_n=MATCH_REASONING_TOP_N)
+                    matched_jobs += lexical_rest
+                else:
+                    flash("We're serving a lot of requests right now, so these matches use quick keyword ranking.", 'info')
+                    matched_jobs = rank_jobs_lexically(resume_data, job_listings)
 
                 if not matched_jobs:
                     flash('No suitable job matches found based on your resume. Try refining your resume or check back later for new listings.', 'info')
@@ -527,5 +644,11 @@ def download_parsed_resume_pdf():
         return redirect(url_for('upload'))
 
 
+@app.route('/metrics')
+def metrics():
+    # Runtime counters for the LLM layer, quotas and fair queue
+    return jsonify(runtime_metrics())
+
+
 if __name__ == '__main__':
     app.run(debug=True)
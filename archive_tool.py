@@ -0,0 +1,108 @@
+# archive_tool.py
+# Works on the raw-page archive written by the scraper (instance/page_archive), offline.
+#
+# Usage:
+#   python archive_tool.py stats
+#   python archive_tool.py train
+#   python archive_tool.py backfill [--limit N] [--url URL] [--reparse] [--dry-run]
+#
+# backfill re-runs job detail extraction over the latest archived fetch of every URL and
+# updates the stored listings, e.g. after a prompt change, without re-scraping anything.
+# --reparse also re-extracts the description text from the archived HTML first (after a
+# change to the description selectors).
+
+import argparse
+import json
+import logging
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+from cli import app, db, JobListing, ResumeJobMatcher
+from job_scraper import build_listing_fields
+from resume_scraper.inference_scheduler import BACKGROUND, inference_priority
+from resume_scraper.page_archive import get_page_archive
+from resume_scraper.scraper import _extract_description
+
+logger = logging.getLogger(__name__)
+
+
+def backfill(limit=None, url=None, reparse=False, dry_run=False):
+    archive = get_page_archive()
+    pages = [archive.latest(url)] if url else archive.iter_latest(limit)
+    processed = updated = created = failed = 0
+
+    with app.app_context(), inference_priority(BACKGROUND):
+        matcher = ResumeJobMatcher()
+        for page in pages:
+            if not page:
+                continue
+            processed += 1
+            description = page["text"]
+            if reparse and page["html"]:
+                description = _extract_description(BeautifulSoup(page["html"], "html.parser")) or description
+            if not description:
+                failed += 1
+                continue
+
+            details = matcher._extract_job_details(description)
+            if not details:
+                logger.warning(f"Extraction failed for archived page {page['url']}")
+                failed += 1
+                continue
+
+            existing_job = JobListing.query.filter_by(job_url=page["url"]).first()
+            card = {}
+            if existing_job:
+                card = {"title": existing_job.job_title, "company": existing_job.company, "location": existing_job.location}
+            fields = build_listing_fields(details, card, page["url"], description)
+            if dry_run:
+                print(json.dumps({"url": page["url"], "job_title": fields.get("job_title"),
+                                  "skills_required": json.loads(fields["skills_required"])}))
+                continue
+
+            if existing_job:
+                for key, value in fields.items():
+                    if hasattr(existing_job, key):
+                        setattr(existing_job, key, value)
+                updated += 1
+            else:
+                fetched_at = datetime.utcfromtimestamp(page["fetched_at"])
+                new_job = JobListing(**fields)
+                new_job.date_posted = fetched_at
+                new_job.scraped_at = fetched_at
+                db.session.add(new_job)
+                created += 1
+            try:
+                db.session.commit()
+            except Exception as e:
+                logger.error(f"Database error for {page['url']}: {e}")
+                db.session.rollback()
+                failed += 1
+
+    print(f"Archived pages processed: {processed}, listings updated: {updated}, created: {created}, failed: {failed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raw-page archive tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show archive size and compression ratio")
+    commands.add_parser("train", help="Retrain the compression dictionary on recent pages")
+    backfill_parser = commands.add_parser("backfill", help="Re-run extraction over archived pages")
+    backfill_parser.add_argument("--limit", type=int, help="Process at most this many URLs")
+    backfill_parser.add_argument("--url", help="Process only this job URL")
+    backfill_parser.add_argument("--reparse", action="store_true", help="Re-extract the description from archived HTML")
+    backfill_parser.add_argument("--dry-run", action="store_true", help="Print extracted fields instead of saving them")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(get_page_archive().stats(), indent=2))
+    elif args.command == "train":
+        dict_id = get_page_archive().train_dictionary()
+        print(f"Trained dictionary {dict_id}" if dict_id else "Not enough archived pages to train a dictionary")
+    else:
+        backfill(limit=args.limit, url=args.url, reparse=args.reparse, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
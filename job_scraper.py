@@ -1,18 +1,21 @@
-import os
 import json
 import logging
-import time
 import urllib.parse
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from selenium.common.exceptions import WebDriverException, TimeoutException
-import random
+from typing import Dict, Iterable, Iterator, Set
 
 # Import necessary functions from your existing modules
-from resume_scraper.scraper import scrape_job_links_from_search_page, scrape_detailed_job_description
+from resume_scraper.scraper import description_hash, fetch_job_descriptions, fetch_stats, iter_job_cards
 # Import the Flask app and db object from cli4.py
 # This allows job_scraper.py to use the same SQLAlchemy database instance and models
 from cli import app, db, JobListing, ResumeJobMatcher # Ensure ResumeJobMatcher is imported for _extract_job_details
+from resume_scraper.inference_scheduler import BACKGROUND, get_scheduler, inference_priority
+from resume_scraper.llm_cache import get_llm_cache
+from resume_scraper.match_cards import match_card_json
+from resume_scraper.page_archive import PAGE_ARCHIVE_ENABLED, get_page_archive
+from resume_scraper.politeness import get_politeness_scheduler
+from resume_scraper.resource_blocking import blocking_stats
+from resume_scraper.webdriver_pool import get_webdriver_pool
 from dotenv import load_dotenv
 
 # Load environment variables (for GEMINI_API_KEY if used by LLM within matcher)
@@ -25,11 +28,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def build_listing_fields(job_listing_details: Dict, card: Dict, job_url: str, detailed_description: str) -> Dict:
+    """Completes extracted job details with the search card's data and prepares them for storage."""
+    job_listing_details = dict(job_listing_details)
+    job_listing_details.update({
+        'job_title': job_listing_details.get('job_title') or card.get('title'),
+        'company': job_listing_details.get('company') or card.get('company'),
+        'location': job_listing_details.get('location') or card.get('location'),
+        'job_url': job_url,
+        'job_description': job_listing_details.get('job_description') or detailed_description,
+        'description_hash': description_hash(detailed_description)
+    })
+
+    # Precompute the compact card the matcher sends instead of the full listing
+    job_listing_details['match_card'] = match_card_json(job_listing_details)
+
+    # Convert lists to JSON strings
+    job_listing_details['requirements'] = json.dumps(job_listing_details.get('requirements', []))
+    job_listing_details['skills_required'] = json.dumps(job_listing_details.get('skills_required', []))
+    return job_listing_details
+
+def _job_urls_to_fetch(cards: Iterable[Dict], fresh_urls: Set[str], job_cards: Dict[str, Dict]) -> Iterator[str]:
+    """Records each streamed search card in job_cards and yields the URLs that need fetching."""
+    for card in cards:
+        job_url = card.get('url')
+        if not job_url or job_url in job_cards:
+            continue
+        job_cards[job_url] = card
+        if job_url not in fresh_urls:
+            yield job_url
+
 def run_job_scraping():
-    with app.app_context():
+    # LLM extraction here runs at background priority so interactive uploads are served first
+    with app.app_context(), inference_priority(BACKGROUND):
         logger.info("Starting background job scraping process...")
 
-        matcher = ResumeJobMatcher(model_name="llama3.2")
+        matcher = ResumeJobMatcher()
 
         nepal_cities = ["Kathmandu", "Pokhara", "Lalitpur"]
         # Use a more conservative time window and add more search parameters
@@ -53,8 +87,9 @@ def run_job_scraping():
         total_scraped_jobs = 0
         total_new_jobs = 0
         total_updated_jobs = 0
+        total_unchanged_jobs = 0
+        total_skipped_fresh = 0
         max_retries = 3
-        base_delay = 5  # Base delay between retries in seconds
 
         for city in nepal_cities:
             for keyword in primary_keywords:
@@ -69,110 +104,89 @@ def run_job_scraping():
                         
                         logger.info(f"Attempt {attempt + 1}/{max_retries}: Scraping jobs for '{keyword}' in '{city}'")
                         
-                        initial_job_cards = scrape_job_links_from_search_page(search_url)
-                        if initial_job_cards:
-                            logger.info(f"Found {len(initial_job_cards)} job cards for '{keyword}' in '{city}'")
-                            
-                            for card in initial_job_cards:
-                                job_url = card.get('url')
-                                if not job_url:
-                                    continue
-
-                                # Check if job exists and is fresh enough
-                                existing_job = JobListing.query.filter_by(job_url=job_url).first()
-                                if existing_job and existing_job.scraped_at > datetime.utcnow() - timedelta(hours=12):
+                        # Jobs stored within the last 12 hours are not fetched again
+                        fresh_cutoff = datetime.utcnow() - timedelta(hours=12)
+                        fresh_urls = {url for (url,) in db.session.query(JobListing.job_url).filter(JobListing.scraped_at > fresh_cutoff)}
+                        job_cards = {}
+
+                        # Cards stream in while the search pages load; each job's description is
+                        # fetched as soon as its card arrives, and extraction and DB writes for one
+                        # job overlap with the search and fetches of the others
+                        job_urls = _job_urls_to_fetch(iter_job_cards(search_url), fresh_urls, job_cards)
+                        for job_url, detailed_description in fetch_job_descriptions(job_urls):
+                            if not detailed_description:
+                                logger.error(f"Failed to scrape {job_url}")
+                                continue
+                            card = job_cards[job_url]
+                            existing_job = JobListing.query.filter_by(job_url=job_url).first()
+                            if existing_job and existing_job.description_hash == description_hash(detailed_description):
+                                # Posting unchanged since it was extracted: no LLM call, just mark it fresh
+                                existing_job.scraped_at = datetime.utcnow()
+                                try:
+                                    db.session.commit()
+                                    total_unchanged_jobs += 1
                                     total_scraped_jobs += 1
-                                    continue
+                                except Exception as db_error:
+                                    logger.error(f"Database error: {db_error}")
+                                    db.session.rollback()
+                                continue
+                            try:
+                                job_listing_details = matcher._extract_job_details(detailed_description)
+                                if job_listing_details:
+                                    job_listing_details = build_listing_fields(job_listing_details, card, job_url, detailed_description)
+
+                                    if existing_job:
+                                        # Update existing job
+                                        for key, value in job_listing_details.items():
+                                            if hasattr(existing_job, key):
+                                                setattr(existing_job, key, value)
+                                        existing_job.scraped_at = datetime.utcnow()
+                                        total_updated_jobs += 1
+                                    else:
+                                        # Create new job
+                                        new_job = JobListing(**job_listing_details)
+                                        new_job.date_posted = datetime.utcnow()
+                                        new_job.scraped_at = datetime.utcnow()
+                                        db.session.add(new_job)
+                                        total_new_jobs += 1
 
-                                # Add exponential backoff between job detail scraping
-                                retry_count = 0
-                                while retry_count < max_retries:
-                                    try:
-                                        detailed_description = scrape_detailed_job_description(job_url)
-                                        if detailed_description:
-                                            break
-                                    except WebDriverException as e:
-                                        retry_count += 1
-                                        if retry_count < max_retries:
-                                            sleep_time = base_delay * (2 ** retry_count) + random.uniform(1, 3)
-                                            logger.warning(f"Retry {retry_count} for {job_url}. Waiting {sleep_time:.1f}s")
-                                            time.sleep(sleep_time)
-                                        else:
-                                            logger.error(f"Failed to scrape {job_url} after {max_retries} attempts")
-                                            continue
-
-                                if detailed_description:
                                     try:
-                                        job_listing_details = matcher._extract_job_details(detailed_description)
-                                        if job_listing_details:
-                                            # Update with card data and prepare for storage
-                                            job_listing_details.update({
-                                                'job_title': job_listing_details.get('job_title') or card.get('title'),
-                                                'company': job_listing_details.get('company') or card.get('company'),
-                                                'location': job_listing_details.get('location') or card.get('location'),
-                                                'job_url': job_url,
-                                                'job_description': job_listing_details.get('job_description') or detailed_description
-                                            })
-
-                                            # Convert lists to JSON strings
-                                            job_listing_details['requirements'] = json.dumps(job_listing_details.get('requirements', []))
-                                            job_listing_details['skills_required'] = json.dumps(job_listing_details.get('skills_required', []))
-
-                                            if existing_job:
-                                                # Update existing job
-                                                for key, value in job_listing_details.items():
-                                                    if hasattr(existing_job, key):
-                                                        setattr(existing_job, key, value)
-                                                existing_job.scraped_at = datetime.utcnow()
-                                                total_updated_jobs += 1
-                                            else:
-                                                # Create new job
-                                                new_job = JobListing(**job_listing_details)
-                                                new_job.date_posted = datetime.utcnow()
-                                                new_job.scraped_at = datetime.utcnow()
-                                                db.session.add(new_job)
-                                                total_new_jobs += 1
-
-                                            try:
-                                                db.session.commit()
-                                                total_scraped_jobs += 1
-                                            except Exception as db_error:
-                                                logger.error(f"Database error: {db_error}")
-                                                db.session.rollback()
-
-                                            # Add random delay between jobs
-                                            time.sleep(random.uniform(2, 5))
-                                    except Exception as e:
-                                        logger.error(f"Error processing job details: {e}")
-                                        continue
-
+                                        db.session.commit()
+                                        total_scraped_jobs += 1
+                                    except Exception as db_error:
+                                        logger.error(f"Database error: {db_error}")
+                                        db.session.rollback()
+                            except Exception as e:
+                                logger.error(f"Error processing job details: {e}")
+                                continue
+
+                        if job_cards:
+                            fresh_skipped = sum(1 for url in job_cards if url in fresh_urls)
+                            total_skipped_fresh += fresh_skipped
+                            logger.info(f"Found {len(job_cards)} job cards for '{keyword}' in '{city}' ({fresh_skipped} still fresh)")
                             # Successfully processed this keyword/city combination
                             break
-                        else:
-                            logger.warning(f"No jobs found for {keyword} in {city} on attempt {attempt + 1}")
-                            if attempt < max_retries - 1:
-                                sleep_time = base_delay * (2 ** attempt) + random.uniform(1, 3)
-                                logger.info(f"Waiting {sleep_time:.1f}s before retry...")
-                                time.sleep(sleep_time)
+                        # The politeness scheduler backs off the host before the retry's page load
+                        logger.warning(f"No jobs found for {keyword} in {city} on attempt {attempt + 1}")
 
                     except Exception as e:
                         logger.error(f"Error during job scraping for {keyword} in {city}: {e}")
-                        if attempt < max_retries - 1:
-                            sleep_time = base_delay * (2 ** attempt) + random.uniform(1, 3)
-                            logger.info(f"Waiting {sleep_time:.1f}s before retry...")
-                            time.sleep(sleep_time)
                         continue
 
-                # Add delay between different keywords
-                time.sleep(random.uniform(5, 10))
-
-            # Add longer delay between cities
-            time.sleep(random.uniform(15, 30))
-
         logger.info(f"Background scraping completed!")
         logger.info(f"Total jobs processed: {total_scraped_jobs}")
         logger.info(f"New jobs added: {total_new_jobs}")
         logger.info(f"Existing jobs updated: {total_updated_jobs}")
+        logger.info(f"Existing jobs unchanged (extraction skipped): {total_unchanged_jobs}")
+        logger.info(f"Jobs still fresh (fetch skipped): {total_skipped_fresh}")
+        logger.info(f"LLM cache stats: {get_llm_cache().stats()}")
+        logger.info(f"Inference scheduler stats: {get_scheduler().stats()}")
+        logger.info(f"Browser pool stats: {get_webdriver_pool().stats()}")
+        logger.info(f"Detail fetch tiers: {fetch_stats()}")
+        logger.info(f"Per-host crawl stats: {get_politeness_scheduler().stats()}")
+        logger.info(f"Browser page loads: {blocking_stats()}")
+        if PAGE_ARCHIVE_ENABLED:
+            logger.info(f"Page archive stats: {get_page_archive().stats()}")
 
 if __name__ == '__main__':
     # You would typically schedule this script (e.g., with cron on Linux/macOS, Task Scheduler on Windows)
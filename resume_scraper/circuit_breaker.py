@@ -0,0 +1,133 @@
+# circuit_breaker.py
+import logging
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+RESET_TIMEOUT_SECONDS = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-backend circuit breaker.
+    After FAILURE_THRESHOLD consecutive failures the circuit opens and calls fail immediately.
+    Once RESET_TIMEOUT_SECONDS have passed a single probe call is let through (half-open):
+    success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.short_circuited = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected (open and not yet due for a probe)."""
+        with self._lock:
+            if self.state == OPEN:
+                return time.time() < self.opened_at + self.reset_timeout
+            return self.state == HALF_OPEN and self._probe_in_flight
+
+    def _allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() >= self.opened_at + self.reset_timeout:
+                logger.info(f"{self.name} circuit half-open, sending probe request")
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"{self.name} circuit closed")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"{self.name} circuit opened after {self.consecutive_failures} consecutive failures")
+                self.state = OPEN
+                self.opened_at = time.time()
+
+    def _record_error(self, error: Exception, is_failure: Optional[Callable[[Exception], bool]]):
+        # Errors the backend answered with (bad request, unknown model) don't mean it is down
+        if is_failure is None or is_failure(error):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def call(self, fn: Callable[[], str], is_failure: Optional[Callable[[Exception], bool]] = None) -> str:
+        if not self._allow_request():
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+        try:
+            result = fn()
+        except Exception as e:
+            self._record_error(e, is_failure)
+            raise
+        self.record_success()
+        return result
+
+    async def call_async(self, fn: Callable[[], Awaitable[str]],
+                         is_failure: Optional[Callable[[Exception], bool]] = None) -> str:
+        if not self._allow_request():
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+        try:
+            result = await fn()
+        except Exception as e:
+            self._record_error(e, is_failure)
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "short_circuited": self.short_circuited,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Returns the process-wide breaker for a backend ("ollama", "gemini")."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_stats() -> Dict:
+    with _breakers_lock:
+        return {name: breaker.stats() for name, breaker in _breakers.items()}
@@ -0,0 +1,196 @@
+# inference_scheduler.py
+import contextvars
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Shared between the Flask app and job_scraper.py through one SQLite file
+SCHEDULER_PATH = os.getenv("INFERENCE_SCHEDULER_PATH", os.path.join(_PROJECT_ROOT, "instance", "inference_scheduler.db"))
+MAX_CONCURRENCY = int(os.getenv("INFERENCE_MAX_CONCURRENCY", "4"))  # total in-flight Ollama calls
+BACKGROUND_MAX_CONCURRENCY = int(os.getenv("INFERENCE_BACKGROUND_MAX_CONCURRENCY", "1"))
+SLOT_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_SLOT_TIMEOUT", "120"))  # reclaim slots of crashed processes
+# Running slots are refreshed this often for as long as their call runs, so only dead processes time out
+SLOT_HEARTBEAT_SECONDS = min(30.0, SLOT_TIMEOUT_SECONDS / 4)
+POLL_INTERVAL_SECONDS = 0.2
+
+# Priority of LLM calls made from the current thread / task; interactive unless a caller opts out
+_current_priority = contextvars.ContextVar("inference_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def inference_priority(priority: str):
+    """Runs the enclosed LLM calls at the given priority (INTERACTIVE or BACKGROUND)."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+
+class InferenceScheduler:
+    """
+    Cross-process admission control for Ollama calls.
+    Interactive calls get strict priority: background calls are only admitted while no
+    interactive call is waiting, and never more than BACKGROUND_MAX_CONCURRENCY at once.
+    """
+
+    def __init__(self, path: str = SCHEDULER_PATH):
+        self.path = path
+        self.acquired = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.wait_seconds = {INTERACTIVE: 0.0, BACKGROUND: 0.0}
+        self._lock = threading.Lock()
+        self._running_slots = set()
+        self._heartbeat = None
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS inference_slots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    pid INTEGER NOT NULL,
+                    priority TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(SLOT_HEARTBEAT_SECONDS)
+            with self._lock:
+                slot_ids = list(self._running_slots)
+            if not slot_ids:
+                continue
+            now = time.time()
+            try:
+                with self._connect() as conn:
+                    conn.executemany(
+                        "UPDATE inference_slots SET updated_at = ? WHERE id = ?", [(now, slot_id) for slot_id in slot_ids]
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Could not refresh running inference slots: {e}")
+
+    def _track_running(self, slot_id: int):
+        with self._lock:
+            self._running_slots.add(slot_id)
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="inference-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _try_admit(self, slot_id: int, priority: str) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM inference_slots WHERE updated_at < ?", (now - SLOT_TIMEOUT_SECONDS,))
+            counts = dict(conn.execute(
+                "SELECT priority || ':' || state, COUNT(*) FROM inference_slots GROUP BY priority, state"
+            ).fetchall())
+            running_total = counts.get(f"{INTERACTIVE}:running", 0) + counts.get(f"{BACKGROUND}:running", 0)
+
+            if priority == INTERACTIVE:
+                admit = running_total < MAX_CONCURRENCY
+            else:
+                admit = (
+                    counts.get(f"{INTERACTIVE}:waiting", 0) == 0
+                    and counts.get(f"{BACKGROUND}:running", 0) < BACKGROUND_MAX_CONCURRENCY
+                    and running_total < MAX_CONCURRENCY
+                )
+
+            state = "running" if admit else "waiting"
+            cursor = conn.execute(
+                "UPDATE inference_slots SET state = ?, updated_at = ? WHERE id = ?", (state, now, slot_id)
+            )
+            if cursor.rowcount == 0:
+                # Our row was reclaimed as stale while we waited; re-register it
+                conn.execute(
+                    "INSERT INTO inference_slots (id, pid, priority, state, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (slot_id, os.getpid(), priority, state, now)
+                )
+            return admit
+
+    @contextmanager
+    def slot(self, priority: str = None):
+        """Blocks until an inference slot is granted at the given (or current) priority."""
+        priority = priority or current_priority()
+        start = time.time()
+        with self._connect() as conn:
+            slot_id = conn.execute(
+                "INSERT INTO inference_slots (pid, priority, state, updated_at) VALUES (?, ?, 'waiting', ?)",
+                (os.getpid(), priority, start)
+            ).lastrowid
+
+        try:
+            logged = False
+            while not self._try_admit(slot_id, priority):
+                if not logged and priority == BACKGROUND:
+                    logger.info("Background inference backing off while interactive requests are waiting")
+                    logged = True
+                time.sleep(POLL_INTERVAL_SECONDS)
+
+            waited = time.time() - start
+            with self._lock:
+                self.acquired[priority] = self.acquired.get(priority, 0) + 1
+                self.wait_seconds[priority] = self.wait_seconds.get(priority, 0.0) + waited
+            self._track_running(slot_id)
+            yield
+        finally:
+            with self._lock:
+                self._running_slots.discard(slot_id)
+            with self._connect() as conn:
+                conn.execute("DELETE FROM inference_slots WHERE id = ?", (slot_id,))
+
+    def stats(self) -> Dict:
+        stats = {"acquired": dict(self.acquired), "wait_seconds": {k: round(v, 3) for k, v in self.wait_seconds.items()}}
+        try:
+            with self._connect() as conn:
+                stats["slots"] = {
+                    f"{priority}:{state}": count
+                    for priority, state, count in conn.execute(
+                        "SELECT priority, state, COUNT(*) FROM inference_slots GROUP BY priority, state"
+                    )
+                }
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read inference scheduler state: {e}")
+        return stats
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> InferenceScheduler:
+    """Returns the process-wide inference scheduler."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = InferenceScheduler()
+        return _scheduler
@@ -0,0 +1,89 @@
+# lexical_ranking.py
+import json
+import logging
+import re
+from typing import Dict, List, Set, Tuple
+
+from resume_scraper.skills import normalize_skill, resume_skills as _resume_skills
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_STOPWORDS = {
+    "and", "or", "the", "a", "an", "of", "to", "in", "for", "with", "on", "at", "as", "is", "are",
+    "be", "will", "you", "we", "our", "your", "this", "that", "by", "from", "it", "role", "job",
+}
+
+
+def job_fit_for_score(match_score: int) -> str:
+    """Maps a 0-100 match score to the job_fit label used across the app."""
+    if match_score >= 80:
+        return "Excellent Match"
+    elif match_score >= 60:
+        return "Good Match"
+    elif match_score >= 40:
+        return "Moderate Match"
+    return "Poor Match"
+
+
+def _tokens(text: str) -> Set[str]:
+    return {t.rstrip(".") for t in _TOKEN_PATTERN.findall(text.lower()) if t not in _STOPWORDS}
+
+
+def lexical_match(resume_data: Dict, job: Dict, resume_skills: Set[str] = None, resume_tokens: Set[str] = None) -> Dict:
+    """
+    Scores a job against a resume without an LLM: skill overlap (70%) plus word overlap
+    between the resume and the job title/description (30%). Returns match_details.
+    """
+    if resume_skills is None:
+        resume_skills = _resume_skills(resume_data)
+    if resume_tokens is None:
+        resume_tokens = _tokens(json.dumps(resume_data))
+
+    job_skills = [str(s) for s in job.get("skills_required") or []]
+    matched_skills, missing_skills = [], []
+    for skill in job_skills:
+        skill_lower = skill.strip().lower()
+        if normalize_skill(skill) in resume_skills or (_tokens(skill_lower) and _tokens(skill_lower) <= resume_tokens):
+            matched_skills.append(skill)
+        else:
+            missing_skills.append(skill)
+
+    job_tokens = _tokens(f"{job.get('job_title') or ''} {job.get('job_description') or ''}")
+    skill_ratio = len(matched_skills) / len(job_skills) if job_skills else 0.0
+    text_ratio = len(job_tokens & resume_tokens) / len(job_tokens) if job_tokens else 0.0
+    match_score = max(0, min(100, round(100 * (0.7 * skill_ratio + 0.3 * text_ratio))))
+
+    return {
+        "match_score": match_score,
+        "matched_skills": matched_skills,
+        "missing_skills": missing_skills,
+        "match_reasoning": (
+            f"Quick keyword-based match: {len(matched_skills)} of {len(job_skills)} required skills found in your resume."
+            + (f" Consider building experience in: {', '.join(missing_skills[:5])}." if missing_skills else "")
+        ),
+        "job_fit": job_fit_for_score(match_score),
+    }
+
+
+def rank_jobs_lexically(resume_data: Dict, job_listings: List[Dict]) -> List[Dict]:
+    """Ranks jobs by lexical_match; used when LLM matching is unavailable or over quota."""
+    resume_skills = _resume_skills(resume_data)
+    resume_tokens = _tokens(json.dumps(resume_data))
+    matched_jobs = [
+        {**job, "match_details": lexical_match(resume_data, job, resume_skills, resume_tokens)}
+        for job in job_listings
+    ]
+    matched_jobs.sort(key=lambda x: x["match_details"]["match_score"], reverse=True)
+    logger.info(f"Ranked {len(matched_jobs)} jobs lexically.")
+    return matched_jobs
+
+
+def shortlist_jobs(resume_data: Dict, job_listings: List[Dict], limit: int) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Splits jobs into the limit best lexical matches, without match_details (to be scored by
+    the LLM), and the lexically ranked rest, which callers list after the LLM-scored jobs.
+    """
+    ranked = rank_jobs_lexically(resume_data, job_listings)
+    shortlist = [{k: v for k, v in job.items() if k != "match_details"} for job in ranked[:limit]]
+    return shortlist, ranked[limit:]
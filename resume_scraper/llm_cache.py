@@ -0,0 +1,329 @@
+# llm_cache.py
+import asyncio
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+from resume_scraper.singleflight import get_singleflight
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cache configuration (override through .env / environment)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(_PROJECT_ROOT, "instance", "llm_cache.db"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))  # 7 days
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+# How long another process may hold an in-flight claim before waiters give up and run the call themselves
+LLM_INFLIGHT_TIMEOUT_SECONDS = float(os.getenv("LLM_INFLIGHT_TIMEOUT_SECONDS", "180"))
+INFLIGHT_POLL_SECONDS = 0.25
+# Hit/miss counters and last-access times are buffered and written in one transaction, so
+# cache reads never take SQLite's write lock
+ACCESS_FLUSH_SECONDS = float(os.getenv("LLM_CACHE_ACCESS_FLUSH_SECONDS", "5"))
+ACCESS_FLUSH_SIZE = 100
+
+
+def make_cache_key(model: str, options: Optional[Dict], prompt: str) -> str:
+    """
+    Returns a content-addressed key for an LLM call: sha256 over the model name,
+    the generation options and the fully rendered prompt.
+    """
+    payload = json.dumps(
+        {"model": model, "options": options or {}, "prompt": prompt},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _claim_owner() -> str:
+    return f"{os.getpid()}:{threading.get_ident()}"
+
+
+class LLMCache:
+    """
+    SQLite-backed LLM response cache with a TTL and an LRU cap on the number of entries.
+    Safe to share between threads and between processes (Flask app, background scraper, CLI tools).
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.shared_in_flight = 0
+        self._lock = threading.Lock()
+        self._pending_access: Dict[str, float] = {}
+        self._pending_counts: Dict[str, int] = {}
+        self._flushed_at = time.time()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_accessed ON llm_responses (last_accessed)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_inflight (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def _record_access(self, name: str, key: Optional[str] = None, now: Optional[float] = None):
+        with self._lock:
+            if name == "hits":
+                self.hits += 1
+                self._pending_access[key] = now
+            else:
+                self.misses += 1
+            self._pending_counts[name] = self._pending_counts.get(name, 0) + 1
+            due = (len(self._pending_access) >= ACCESS_FLUSH_SIZE
+                   or time.time() - self._flushed_at >= ACCESS_FLUSH_SECONDS)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered hit/miss counters and last-access times."""
+        with self._lock:
+            accesses, self._pending_access = self._pending_access, {}
+            counts, self._pending_counts = self._pending_counts, {}
+            self._flushed_at = time.time()
+        if not accesses and not counts:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "UPDATE llm_responses SET last_accessed = MAX(last_accessed, ?) WHERE key = ?",
+                    [(accessed_at, key) for key, accessed_at in accesses.items()]
+                )
+                conn.executemany(
+                    "INSERT INTO llm_cache_stats (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    list(counts.items())
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache access bookkeeping failed: {e}")
+
+    def get(self, key: str, count: bool = True) -> Optional[str]:
+        """
+        Returns the cached response for key, or None on a miss / expired entry (expired rows
+        are purged by set). count=False re-reads without counting a second lookup.
+        """
+        now = time.time()
+        row = None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read failed, treating as miss: {e}")
+        if row and now - row[1] <= self.ttl_seconds:
+            if count:
+                self._record_access("hits", key, now)
+            return row[0]
+        if count:
+            self._record_access("misses")
+        return None
+
+    def set(self, key: str, model: str, response: str):
+        """Stores a response and evicts expired and least recently used entries."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, model, response, created_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, now, now)
+                )
+                conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+                conn.execute(
+                    "DELETE FROM llm_responses WHERE key IN ("
+                    "SELECT key FROM llm_responses ORDER BY last_accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def claim(self, key: str) -> bool:
+        """
+        Marks key as being computed by this process. False if another process holds an
+        unexpired claim, in which case the caller should wait_for_release and re-read the cache.
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM llm_inflight WHERE key = ? AND expires_at < ?", (key, now))
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO llm_inflight (key, owner, expires_at) VALUES (?, ?, ?)",
+                    (key, _claim_owner(), now + LLM_INFLIGHT_TIMEOUT_SECONDS)
+                )
+                return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            logger.warning(f"LLM in-flight claim failed, running the call directly: {e}")
+            return True
+
+    def release(self, key: str):
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM llm_inflight WHERE key = ? AND owner = ?", (key, _claim_owner()))
+        except sqlite3.Error as e:
+            logger.warning(f"LLM in-flight release failed: {e}")
+
+    def _claim_active(self, key: str) -> bool:
+        try:
+            with self._connect() as conn:
+                return conn.execute(
+                    "SELECT 1 FROM llm_inflight WHERE key = ? AND expires_at >= ?", (key, time.time())
+                ).fetchone() is not None
+        except sqlite3.Error:
+            return False
+
+    def wait_for_release(self, key: str):
+        """Blocks while another process holds the claim on key (up to its expiry)."""
+        with self._lock:
+            self.shared_in_flight += 1
+        while self._claim_active(key):
+            time.sleep(INFLIGHT_POLL_SECONDS)
+
+    async def wait_for_release_async(self, key: str):
+        with self._lock:
+            self.shared_in_flight += 1
+        while await asyncio.to_thread(self._claim_active, key):
+            await asyncio.sleep(INFLIGHT_POLL_SECONDS)
+
+    def stats(self) -> Dict:
+        """Returns hit/miss counters for this process and for all processes sharing the cache file."""
+        self.flush()
+        stats = {"process_hits": self.hits, "process_misses": self.misses, "entries": 0, "hits": 0, "misses": 0}
+        try:
+            with self._connect() as conn:
+                stats["entries"] = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+                for name, value in conn.execute("SELECT name, value FROM llm_cache_stats"):
+                    stats[name] = value
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read LLM cache stats: {e}")
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["coalescing"] = {**get_singleflight().stats(), "waited_on_other_process": self.shared_in_flight}
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Returns the process-wide LLM cache instance."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+            atexit.register(_cache.flush)
+        return _cache
+
+
+def _usable(response, validate: Optional[Callable[[str], bool]]) -> bool:
+    return isinstance(response, str) and bool(response.strip()) and (validate is None or validate(response))
+
+
+def cached_invoke(model: str, options: Optional[Dict], prompt: str, call: Callable[[], str],
+                  validate: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    Returns the cached response for (model, options, prompt) or runs call() and caches its result.
+    Empty responses, and responses rejected by validate, are never cached.
+    Identical calls already in flight, in this process or another one sharing the cache, are
+    waited on and their result shared instead of being sent to the model again.
+    """
+    key = make_cache_key(model, options, prompt)
+    if not LLM_CACHE_ENABLED:
+        return get_singleflight().do(key, call)
+
+    cache = get_llm_cache()
+    cached = cache.get(key)
+    if cached is not None and (validate is None or validate(cached)):
+        logger.debug(f"LLM cache hit for {model} ({key[:12]})")
+        return cached
+
+    def fill() -> str:
+        if not cache.claim(key):
+            cache.wait_for_release(key)
+            shared = cache.get(key, count=False)  # the lookup above already counted this miss
+            if shared is not None and (validate is None or validate(shared)):
+                logger.debug(f"Shared in-flight LLM result from another process for {model} ({key[:12]})")
+                return shared
+            cache.claim(key)  # the other process failed or gave an invalid answer; take over
+        try:
+            response = call()
+            if _usable(response, validate):
+                cache.set(key, model, response)
+            return response
+        finally:
+            cache.release(key)
+
+    return get_singleflight().do(key, fill)
+
+
+async def cached_invoke_async(model: str, options: Optional[Dict], prompt: str, call: Callable[[], Awaitable[str]],
+                              validate: Optional[Callable[[str], bool]] = None) -> str:
+    """Async variant of cached_invoke for coroutine-based clients."""
+    key = make_cache_key(model, options, prompt)
+    if not LLM_CACHE_ENABLED:
+        return await get_singleflight().do_async(key, call)
+
+    cache = get_llm_cache()
+    cached = cache.get(key)
+    if cached is not None and (validate is None or validate(cached)):
+        logger.debug(f"LLM cache hit for {model} ({key[:12]})")
+        return cached
+
+    async def fill() -> str:
+        if not cache.claim(key):
+            await cache.wait_for_release_async(key)
+            shared = cache.get(key, count=False)
+            if shared is not None and (validate is None or validate(shared)):
+                return shared
+            cache.claim(key)
+        try:
+            response = await call()
+            if _usable(response, validate):
+                cache.set(key, model, response)
+            return response
+        finally:
+            cache.release(key)
+
+    return await get_singleflight().do_async(key, fill)
@@ -0,0 +1,191 @@
+# llm_client.py
+import json
+import logging
+import os
+import threading
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
+
+from langchain_ollama import OllamaLLM
+
+from resume_scraper.circuit_breaker import CircuitOpenError, get_breaker
+from resume_scraper.inference_scheduler import INTERACTIVE, current_priority, get_scheduler
+from resume_scraper.llm_cache import cached_invoke
+from resume_scraper.ollama_pool import get_balancer
+from resume_scraper.quotas import current_user, get_fair_queue
+
+logger = logging.getLogger(__name__)
+
+SMALL_MODEL = os.getenv("LLM_SMALL_MODEL", "llama3.2:1b")
+LARGE_MODEL = os.getenv("LLM_LARGE_MODEL", "llama3.2")
+OLLAMA_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_TIMEOUT_SECONDS", "120"))
+
+SMALL_MODEL_KEEP_ALIVE = os.getenv("LLM_SMALL_MODEL_KEEP_ALIVE", "30m")
+LARGE_MODEL_KEEP_ALIVE = os.getenv("LLM_LARGE_MODEL_KEEP_ALIVE", "10m")
+# How long each model stays loaded after a call, whichever route called it
+MODEL_KEEP_ALIVE = {SMALL_MODEL: SMALL_MODEL_KEEP_ALIVE, LARGE_MODEL: LARGE_MODEL_KEEP_ALIVE}
+CHARS_PER_TOKEN = 3.5  # conservative for English prose and JSON on llama tokenizers
+CONTEXT_MARGIN_TOKENS = 128
+
+# Task -> model routing table and inference profile.
+# Structured extraction and per-job scoring run on the small model and escalate to the large
+# one when their output fails validation; only match_reasoning starts on the large model.
+# num_predict caps the output of each task; num_ctx is sized per call from the prompt
+# (see inference_options) within the route's context range.
+TASK_ROUTES = {
+    "job_extraction": {
+        "model": SMALL_MODEL, "escalate_to": LARGE_MODEL, "context": [2048, 8192],
+        "options": {"temperature": 0, "num_predict": 1024, "keep_alive": SMALL_MODEL_KEEP_ALIVE},
+    },
+    "keyword_extraction": {
+        "model": SMALL_MODEL, "escalate_to": LARGE_MODEL, "context": [2048, 8192],
+        "options": {"temperature": 0, "num_predict": 256, "keep_alive": SMALL_MODEL_KEEP_ALIVE},
+    },
+    "match_scoring": {
+        "model": SMALL_MODEL, "escalate_to": LARGE_MODEL, "context": [2048, 4096],
+        "options": {"temperature": 0, "num_predict": 64, "keep_alive": SMALL_MODEL_KEEP_ALIVE},
+    },
+    "match_reasoning": {
+        "model": LARGE_MODEL, "escalate_to": None, "context": [2048, 4096],
+        "options": {"temperature": 0.2, "num_predict": 400, "keep_alive": LARGE_MODEL_KEEP_ALIVE},
+    },
+    "page_parsing": {
+        "model": SMALL_MODEL, "escalate_to": LARGE_MODEL, "context": [2048, 4096],
+        "options": {"temperature": 0, "num_predict": 1024, "keep_alive": SMALL_MODEL_KEEP_ALIVE},
+    },
+}
+
+# Optional overrides, e.g. LLM_ROUTES='{"match_reasoning": {"model": "llama3.1:8b", "options": {"num_predict": 600}}}'
+# "options" are merged into the task's profile; other keys replace the route's value.
+_routes_override = os.getenv("LLM_ROUTES")
+if _routes_override:
+    try:
+        for _task, _route in json.loads(_routes_override).items():
+            _entry = TASK_ROUTES.setdefault(_task, {"model": LARGE_MODEL, "options": {}, "escalate_to": None})
+            _entry["options"] = {**_entry.get("options", {}), **_route.pop("options", {})}
+            _entry.update(_route)
+    except (json.JSONDecodeError, AttributeError, TypeError) as e:
+        logger.error(f"Ignoring invalid LLM_ROUTES override: {e}")
+
+_llms: Dict[str, OllamaLLM] = {}
+_llms_lock = threading.Lock()
+
+
+def get_route(task: str) -> Dict:
+    """Returns the routing entry (model, options, escalate_to, context) for a task."""
+    if task not in TASK_ROUTES:
+        raise ValueError(f"Unknown LLM task: {task}")
+    return TASK_ROUTES[task]
+
+
+def inference_options(task: str, prompt: str, model: Optional[str] = None) -> Dict:
+    """
+    The task's options plus num_ctx sized for this prompt: estimated prompt tokens + the
+    output cap, rounded up to a power of two within the route's context range. Rounding keeps
+    the number of distinct contexts (and Ollama model reloads) per task small.
+    When model is not the route's own model (an escalation or a pinned model), keep_alive is
+    that model's, so it is unloaded on its own schedule.
+    """
+    route = get_route(task)
+    options = dict(route.get("options", {}))
+    if model and model != route["model"]:
+        options.pop("keep_alive", None)
+        if model in MODEL_KEEP_ALIVE:
+            options["keep_alive"] = MODEL_KEEP_ALIVE[model]
+    if "num_ctx" in options:
+        return options  # pinned through LLM_ROUTES
+    min_ctx, max_ctx = route.get("context", [2048, 8192])
+    needed = int(len(prompt) / CHARS_PER_TOKEN) + int(options.get("num_predict") or 0) + CONTEXT_MARGIN_TOKENS
+    num_ctx = min_ctx
+    while num_ctx < needed and num_ctx < max_ctx:
+        num_ctx *= 2
+    num_ctx = min(num_ctx, max_ctx)
+    if needed > num_ctx:
+        logger.warning(f"[{task}] Prompt needs ~{needed} tokens but context is capped at {num_ctx}; input will be truncated")
+    options["num_ctx"] = num_ctx
+    return options
+
+
+def get_llm(model: str, options: Optional[Dict] = None, base_url: Optional[str] = None) -> OllamaLLM:
+    """Returns a reused OllamaLLM client for a model + options + endpoint combination."""
+    key = json.dumps({"model": model, "options": options or {}, "base_url": base_url}, sort_keys=True)
+    with _llms_lock:
+        if key not in _llms:
+            _llms[key] = OllamaLLM(
+                model=model,
+                base_url=base_url,
+                client_kwargs={"timeout": OLLAMA_TIMEOUT_SECONDS},
+                **(options or {})
+            )
+            logger.info(f"Initialized LLM model: {model} on {base_url or 'default endpoint'} {options or {}}")
+        return _llms[key]
+
+
+def _run_on_pool(model: str, options: Dict, prompt: str) -> str:
+    """
+    Runs one prompt on whichever Ollama endpoint the balancer picks, once the
+    inference scheduler grants a slot at the caller's priority. Interactive calls made
+    on behalf of a user are fair-queued against other users first.
+    """
+    def run():
+        user_id = current_user()
+        fair_slot = get_fair_queue().slot(user_id) if user_id and current_priority() == INTERACTIVE else nullcontext()
+        with fair_slot, get_scheduler().slot():
+            return get_balancer().invoke(lambda base_url: get_llm(model, options, base_url).invoke(prompt))
+
+    # While Ollama is down this raises CircuitOpenError immediately instead of queueing and timing out
+    return get_breaker("ollama").call(run, is_failure=_is_backend_failure)
+
+
+def _is_backend_failure(error: Exception) -> bool:
+    """Connection errors, timeouts and 5xx count against the circuit; 4xx (e.g. unknown model) don't."""
+    status_code = getattr(error, "status_code", None)
+    return not isinstance(status_code, int) or status_code >= 500
+
+
+def ollama_available() -> bool:
+    """False while the Ollama circuit is open, so callers can go straight to a degraded path."""
+    return not get_breaker("ollama").is_open()
+
+
+def _models_for(task: str, model: Optional[str] = None) -> List[str]:
+    if model:
+        return [model]
+    route = get_route(task)
+    models = [route["model"]]
+    if route.get("escalate_to") and route["escalate_to"] != route["model"]:
+        models.append(route["escalate_to"])
+    return models
+
+
+def invoke(task: str, prompt: str, validate: Optional[Callable[[str], bool]] = None,
+           model: Optional[str] = None) -> str:
+    """
+    Runs a prompt on the model routed for task, through the shared response cache.
+    If the response fails validate (or the call errors), the prompt is retried on the
+    route's escalation model. Passing model pins the call to that model only.
+    """
+    models = _models_for(task, model)
+    response = ""
+    for i, model_name in enumerate(models):
+        is_last = i == len(models) - 1
+        options = inference_options(task, prompt, model_name)
+        try:
+            response = cached_invoke(
+                model_name, options, prompt,
+                lambda: _run_on_pool(model_name, options, prompt),
+                validate=validate
+            )
+        except CircuitOpenError:
+            raise  # every model is served by the same backend
+        except Exception as e:
+            if is_last:
+                raise
+            logger.warning(f"[{task}] {model_name} failed ({e}), escalating to {models[i + 1]}")
+            continue
+
+        if validate is None or validate(response):
+            return response
+        if not is_last:
+            logger.warning(f"[{task}] Response from {model_name} failed validation, escalating to {models[i + 1]}")
+    return response
@@ -0,0 +1,83 @@
+# match_cards.py
+import json
+import os
+import re
+from typing import Dict, List
+
+from resume_scraper.skills import normalize_skill
+
+# Limits that keep a card a few hundred characters regardless of how long the posting is
+MATCH_CARD_MAX_REQUIREMENTS = int(os.getenv("MATCH_CARD_MAX_REQUIREMENTS", "6"))
+MATCH_CARD_REQUIREMENT_CHARS = 120
+MATCH_CARD_SUMMARY_CHARS = int(os.getenv("MATCH_CARD_SUMMARY_CHARS", "280"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _clip(text: str, limit: int) -> str:
+    text = _WHITESPACE.sub(" ", str(text or "")).strip()
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0].rstrip(",;:") + "…"
+
+
+def _summary(description: str) -> str:
+    """The leading sentences of the description, up to MATCH_CARD_SUMMARY_CHARS."""
+    text = _WHITESPACE.sub(" ", description or "").strip()
+    summary = ""
+    for sentence in _SENTENCE_END.split(text):
+        if summary and len(summary) + len(sentence) + 1 > MATCH_CARD_SUMMARY_CHARS:
+            break
+        summary = f"{summary} {sentence}".strip()
+    return _clip(summary, MATCH_CARD_SUMMARY_CHARS)
+
+
+def _as_list(value) -> List:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            value = [value]
+    return value if isinstance(value, list) else []
+
+
+def build_match_card(job: Dict) -> Dict:
+    """
+    Compact, token-minimal view of a job listing holding only what matching needs:
+    title, level, canonical skills, the leading requirements and a short summary.
+    Built once at ingest and stored with the listing.
+    """
+    skills, seen = [], set()
+    for skill in _as_list(job.get("skills_required")):
+        canonical = normalize_skill(skill)
+        if canonical and canonical not in seen:
+            seen.add(canonical)
+            skills.append(canonical)
+
+    requirements = []
+    for requirement in _as_list(job.get("requirements")):
+        clipped = _clip(requirement, MATCH_CARD_REQUIREMENT_CHARS)
+        if clipped and clipped not in requirements:
+            requirements.append(clipped)
+        if len(requirements) >= MATCH_CARD_MAX_REQUIREMENTS:
+            break
+
+    card = {
+        "title": _clip(job.get("job_title"), 100),
+        "level": job.get("experience_level") or "",
+        "skills": skills,
+        "requirements": requirements,
+        "summary": _summary(job.get("job_description")),
+    }
+    return {key: value for key, value in card.items() if value}
+
+
+def match_card_json(job: Dict) -> str:
+    """The job's stored match card as compact JSON, building it if the listing predates cards."""
+    card = job.get("match_card")
+    if isinstance(card, str) and card:
+        return card
+    if not isinstance(card, dict) or not card:
+        card = build_match_card(job)
+    return json.dumps(card, separators=(",", ":"), ensure_ascii=False)
@@ -0,0 +1,28 @@
+# metrics.py
+from typing import Dict
+
+from resume_scraper.circuit_breaker import breaker_stats
+from resume_scraper.inference_scheduler import get_scheduler
+from resume_scraper.llm_cache import get_llm_cache
+from resume_scraper.ollama_pool import get_balancer
+from resume_scraper.quotas import get_fair_queue, get_quota_manager
+from resume_scraper.rate_limiter import get_gemini_limiter
+
+
+def runtime_metrics() -> Dict:
+    """
+    Runtime counters for the LLM layer, served as /metrics by both web apps. Cache, scheduler
+    and rate limiter state is shared with the background scraper; quota usage and the fair
+    queue are per process.
+    """
+    quotas = get_quota_manager()
+    return {
+        'llm_cache': get_llm_cache().stats(),
+        'ollama': get_balancer().stats(),
+        'inference_scheduler': get_scheduler().stats(),
+        'quota_usage': quotas.stats(),
+        'quota_buckets_evicted': quotas.evicted,
+        'fair_queue': get_fair_queue().stats(),
+        'gemini_rate_limiter': get_gemini_limiter().stats(),
+        'circuit_breakers': breaker_stats()
+    }
@@ -0,0 +1,218 @@
+# ollama_pool.py
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated list of Ollama servers, e.g. "http://10.0.0.5:11434,http://10.0.0.6:11434"
+OLLAMA_ENDPOINTS = [
+    url.strip().rstrip("/")
+    for url in os.getenv("OLLAMA_ENDPOINTS", "http://localhost:11434").split(",")
+    if url.strip()
+]
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("OLLAMA_HEALTH_CHECK_INTERVAL", "15"))
+EJECT_AFTER_FAILURES = int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "3"))
+EJECT_SECONDS = float(os.getenv("OLLAMA_EJECT_SECONDS", "60"))
+SLOW_NODE_FACTOR = float(os.getenv("OLLAMA_SLOW_NODE_FACTOR", "3.0"))  # eject when this much slower than the fastest node
+HEDGE_AFTER_SECONDS = float(os.getenv("OLLAMA_HEDGE_AFTER_SECONDS", "0"))  # 0 = derive from observed latency
+EWMA_ALPHA = 0.3
+
+
+class OllamaEndpoint:
+    """Bookkeeping for a single Ollama server."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma_latency = None
+        self.ejected_until = 0.0
+        self.eject_reason = None
+
+    def eject(self, reason: str):
+        self.ejected_until = time.time() + EJECT_SECONDS
+        self.eject_reason = reason
+
+    def is_available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def to_dict(self) -> Dict:
+        return {
+            "url": self.url,
+            "healthy": self.is_available(time.time()),
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ewma_latency_seconds": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+        }
+
+
+class OllamaBalancer:
+    """
+    Client-side balancer over several Ollama servers.
+    Routes each call to the available endpoint with the fewest outstanding requests,
+    ejects endpoints that keep failing or are much slower than their peers, and sends a
+    hedged duplicate of a straggling call to a second endpoint.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.endpoints = [OllamaEndpoint(url) for url in urls]
+        self.hedged_requests = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 4 * len(urls)), thread_name_prefix="ollama")
+        self._health_thread = None
+
+    def start_health_checks(self):
+        if self._health_thread is None and len(self.endpoints) > 1:
+            self._health_thread = threading.Thread(target=self._health_check_loop, name="ollama-health", daemon=True)
+            self._health_thread.start()
+
+    def _health_check_loop(self):
+        while True:
+            for endpoint in self.endpoints:
+                try:
+                    requests.get(f"{endpoint.url}/api/tags", timeout=3).raise_for_status()
+                    with self._lock:
+                        # Slow nodes sit out their full ejection period; failed nodes come back once healthy
+                        if not endpoint.is_available(time.time()) and endpoint.eject_reason != "slow":
+                            logger.info(f"Ollama endpoint {endpoint.url} passed health check, reinstating")
+                            endpoint.ejected_until = 0.0
+                            endpoint.consecutive_failures = 0
+                except requests.RequestException as e:
+                    with self._lock:
+                        endpoint.eject("health_check")
+                    logger.warning(f"Ollama endpoint {endpoint.url} failed health check: {e}")
+            time.sleep(HEALTH_CHECK_INTERVAL_SECONDS)
+
+    def _pick(self, exclude: Optional[OllamaEndpoint] = None) -> Optional[OllamaEndpoint]:
+        now = time.time()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e is not exclude and e.is_available(now)]
+            if not candidates:
+                # Everything is ejected: fall back to any endpoint rather than failing outright
+                candidates = [e for e in self.endpoints if e is not exclude]
+            if not candidates:
+                return None
+            endpoint = min(candidates, key=lambda e: (e.outstanding, e.ewma_latency or 0.0))
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _record(self, endpoint: OllamaEndpoint, latency: Optional[float]):
+        with self._lock:
+            endpoint.outstanding -= 1
+            if latency is None:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= EJECT_AFTER_FAILURES:
+                    endpoint.eject("failures")
+                    logger.warning(f"Ejecting Ollama endpoint {endpoint.url} after {endpoint.consecutive_failures} failures")
+                return
+
+            endpoint.consecutive_failures = 0
+            if endpoint.ewma_latency is None:
+                endpoint.ewma_latency = latency
+            else:
+                endpoint.ewma_latency = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * endpoint.ewma_latency
+
+            latencies = [e.ewma_latency for e in self.endpoints if e.ewma_latency is not None]
+            fastest = min(latencies)
+            if len(self.endpoints) > 1 and endpoint.ewma_latency > SLOW_NODE_FACTOR * fastest:
+                endpoint.eject("slow")
+                # Start from a neutral estimate when the node is reinstated
+                endpoint.ewma_latency = fastest
+                logger.warning(f"Ejecting slow Ollama endpoint {endpoint.url} ({latency:.1f}s vs fastest {fastest:.1f}s)")
+
+    def _call(self, endpoint: OllamaEndpoint, call: Callable[[str], str]) -> str:
+        start = time.time()
+        try:
+            result = call(endpoint.url)
+        except Exception:
+            self._record(endpoint, None)
+            raise
+        self._record(endpoint, time.time() - start)
+        return result
+
+    def _hedge_delay(self, endpoint: OllamaEndpoint) -> Optional[float]:
+        if len(self.endpoints) < 2:
+            return None
+        if HEDGE_AFTER_SECONDS > 0:
+            return HEDGE_AFTER_SECONDS
+        if endpoint.ewma_latency is None:
+            return None
+        return 2 * endpoint.ewma_latency
+
+    def invoke(self, call: Callable[[str], str]) -> str:
+        """
+        Runs call(base_url) on the least loaded endpoint. A straggling call is hedged on a second
+        endpoint and the first successful result wins; a failed call is retried once elsewhere.
+        """
+        primary = self._pick()
+        hedge_delay = self._hedge_delay(primary)
+        if hedge_delay is None:
+            try:
+                return self._call(primary, call)
+            except Exception as e:
+                secondary = self._pick(exclude=primary) if len(self.endpoints) > 1 else None
+                if secondary is None:
+                    raise
+                logger.warning(f"Ollama call on {primary.url} failed ({e}), retrying on {secondary.url}")
+                return self._call(secondary, call)
+
+        futures = {self._executor.submit(self._call, primary, call): primary}
+        done, _ = wait(futures, timeout=hedge_delay)
+        if not done:
+            secondary = self._pick(exclude=primary)
+            if secondary is not None:
+                with self._lock:
+                    self.hedged_requests += 1
+                logger.info(f"Hedging straggling Ollama call from {primary.url} to {secondary.url}")
+                futures[self._executor.submit(self._call, secondary, call)] = secondary
+
+        last_error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+            if not pending and len(futures) == 1:
+                # Primary failed before a hedge was sent: retry once on another endpoint
+                secondary = self._pick(exclude=primary)
+                if secondary is not None:
+                    logger.warning(f"Ollama call on {primary.url} failed ({last_error}), retrying on {secondary.url}")
+                    futures[self._executor.submit(self._call, secondary, call)] = secondary
+                    pending = {f for f in futures if not f.done()}
+        raise last_error
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hedged_requests": self.hedged_requests,
+                "endpoints": [e.to_dict() for e in self.endpoints],
+            }
+
+
+_balancer = None
+_balancer_lock = threading.Lock()
+
+
+def get_balancer() -> OllamaBalancer:
+    """Returns the process-wide balancer over OLLAMA_ENDPOINTS."""
+    global _balancer
+    with _balancer_lock:
+        if _balancer is None:
+            _balancer = OllamaBalancer(OLLAMA_ENDPOINTS)
+            _balancer.start_health_checks()
+            logger.info(f"Ollama balancer initialized with endpoints: {OLLAMA_ENDPOINTS}")
+        return _balancer
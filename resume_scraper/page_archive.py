@@ -0,0 +1,315 @@
+# page_archive.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import zstandard
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Raw detail pages (HTML and extracted text) as fetched, so extraction can be re-run offline
+PAGE_ARCHIVE_ENABLED = os.getenv("PAGE_ARCHIVE_ENABLED", "1") != "0"
+PAGE_ARCHIVE_DIR = os.getenv("PAGE_ARCHIVE_DIR", os.path.join(_PROJECT_ROOT, "instance", "page_archive"))
+PAGE_ARCHIVE_LEVEL = int(os.getenv("PAGE_ARCHIVE_LEVEL", "19"))
+# A dictionary is trained automatically once this many blobs exist; `archive_tool.py train` retrains
+PAGE_ARCHIVE_DICT_MIN_SAMPLES = int(os.getenv("PAGE_ARCHIVE_DICT_MIN_SAMPLES", "200"))
+PAGE_ARCHIVE_DICT_SIZE = int(os.getenv("PAGE_ARCHIVE_DICT_SIZE", str(112 * 1024)))
+PAGE_ARCHIVE_DICT_MAX_SAMPLES = 2000
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class PageArchive:
+    """
+    Content-addressed store of fetched pages. Each distinct text or HTML body is written
+    once, zstd-compressed, to blobs/<hash[:2]>/<hash>.zst; an SQLite index records which
+    URL was fetched when (and by which tier) and the hashes of its text and HTML.
+
+    Job pages share most of their markup, so blobs are compressed with a dictionary trained
+    on earlier pages. Frames carry their dictionary id and old dictionaries are kept, so
+    retraining never makes existing blobs unreadable.
+    """
+
+    def __init__(self, root: str = PAGE_ARCHIVE_DIR, level: int = PAGE_ARCHIVE_LEVEL):
+        self.root = root
+        self.level = level
+        self.index_path = os.path.join(root, "index.db")
+        self._lock = threading.Lock()
+        self._dicts: Dict[int, zstandard.ZstdCompressionDict] = {}
+        # ZstdCompressor objects must not be shared between threads: one per thread
+        self._local = threading.local()
+        self._training = False
+
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(root, "dicts"), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    tier TEXT,
+                    text_hash TEXT,
+                    html_hash TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_url_fetched_at ON pages (url, fetched_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    hash TEXT PRIMARY KEY,
+                    dict_id INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    compressed_size INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS http_validators (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    text_hash TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archive_meta (
+                    name TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            with conn:  # commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], f"{digest}.zst")
+
+    def _dict_path(self, dict_id: int) -> str:
+        return os.path.join(self.root, "dicts", f"{dict_id}.zdict")
+
+    def _load_dict(self, dict_id: int) -> zstandard.ZstdCompressionDict:
+        with self._lock:
+            if dict_id not in self._dicts:
+                with open(self._dict_path(dict_id), "rb") as f:
+                    self._dicts[dict_id] = zstandard.ZstdCompressionDict(f.read())
+            return self._dicts[dict_id]
+
+    def _current_dict_id(self) -> int:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM archive_meta WHERE name = 'dict_id'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _get_compressor(self) -> Tuple[int, zstandard.ZstdCompressor]:
+        # This thread's compressor; rebuilt when another process (or `train`) switched the current dictionary
+        dict_id = self._current_dict_id()
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None or compressor[0] != dict_id:
+            dict_data = self._load_dict(dict_id) if dict_id else None
+            compressor = (dict_id, zstandard.ZstdCompressor(level=self.level, dict_data=dict_data))
+            self._local.compressor = compressor
+        return compressor
+
+    def _put_blob(self, data: bytes) -> str:
+        digest = content_hash(data)
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return digest
+        dict_id, compressor = self._get_compressor()
+        compressed = compressor.compress(data)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)  # atomic: readers never see a partial blob
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (hash, dict_id, size, compressed_size, created_at) VALUES (?, ?, ?, ?, ?)",
+                (digest, dict_id, len(data), len(compressed), time.time())
+            )
+        return digest
+
+    def get_blob(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(digest), "rb") as f:
+                compressed = f.read()
+        except FileNotFoundError:
+            return None
+        dict_id = zstandard.get_frame_parameters(compressed).dict_id
+        dict_data = self._load_dict(dict_id) if dict_id else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(compressed)
+
+    def put(self, url: str, text: Optional[str], html: Optional[str], tier: str,
+            fetched_at: Optional[float] = None, validators: Optional[Dict] = None) -> Optional[int]:
+        """
+        Archives one fetch of url; returns its index id, or None if archiving failed.
+        validators (the response's ETag / Last-Modified) are kept for conditional re-fetches.
+        """
+        try:
+            text_hash = self._put_blob(text.encode("utf-8")) if text else None
+            html_hash = self._put_blob(html.encode("utf-8")) if html else None
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO pages (url, fetched_at, tier, text_hash, html_hash) VALUES (?, ?, ?, ?, ?)",
+                    (url, fetched_at or time.time(), tier, text_hash, html_hash)
+                )
+                page_id = cursor.lastrowid
+                if text_hash and validators and (validators.get("etag") or validators.get("last_modified")):
+                    conn.execute(
+                        "INSERT OR REPLACE INTO http_validators (url, etag, last_modified, text_hash) VALUES (?, ?, ?, ?)",
+                        (url, validators.get("etag"), validators.get("last_modified"), text_hash)
+                    )
+                elif tier == "http":
+                    conn.execute("DELETE FROM http_validators WHERE url = ?", (url,))
+        except (OSError, sqlite3.Error, zstandard.ZstdError) as e:
+            logger.warning(f"Could not archive page {url}: {e}")
+            return None
+        self._maybe_train()
+        return page_id
+
+    def validators(self, url: str) -> Optional[Dict]:
+        """ETag / Last-Modified of url's last HTTP fetch and the hash of the text it yielded."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT etag, last_modified, text_hash FROM http_validators WHERE url = ?", (url,)
+            ).fetchone()
+        return {"etag": row[0], "last_modified": row[1], "text_hash": row[2]} if row else None
+
+    def get_text(self, digest: str) -> Optional[str]:
+        data = self.get_blob(digest)
+        return data.decode("utf-8") if data is not None else None
+
+    def _load_page(self, row) -> Dict:
+        page_id, url, fetched_at, tier, text_hash, html_hash = row
+        text = self.get_blob(text_hash) if text_hash else None
+        html = self.get_blob(html_hash) if html_hash else None
+        return {
+            "id": page_id,
+            "url": url,
+            "fetched_at": fetched_at,
+            "tier": tier,
+            "text": text.decode("utf-8") if text is not None else None,
+            "html": html.decode("utf-8") if html is not None else None,
+        }
+
+    def latest(self, url: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, url, fetched_at, tier, text_hash, html_hash FROM pages "
+                "WHERE url = ? ORDER BY fetched_at DESC LIMIT 1", (url,)
+            ).fetchone()
+        return self._load_page(row) if row else None
+
+    def iter_latest(self, limit: Optional[int] = None) -> Iterator[Dict]:
+        """The most recent archived fetch of every URL, oldest URL first."""
+        query = (
+            "SELECT id, url, fetched_at, tier, text_hash, html_hash FROM pages p "
+            "WHERE id = (SELECT id FROM pages WHERE url = p.url ORDER BY fetched_at DESC LIMIT 1) "
+            "ORDER BY fetched_at"
+        )
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._connect() as conn:
+            rows = conn.execute(query).fetchall()
+        for row in rows:
+            yield self._load_page(row)
+
+    def _maybe_train(self):
+        if self._current_dict_id() or self._training:
+            return
+        with self._connect() as conn:
+            blob_count = conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+        if blob_count >= PAGE_ARCHIVE_DICT_MIN_SAMPLES:
+            # Off the scraping thread: training on a few thousand pages takes a few seconds
+            threading.Thread(target=self.train_dictionary, name="page-archive-train", daemon=True).start()
+
+    def train_dictionary(self, max_samples: int = PAGE_ARCHIVE_DICT_MAX_SAMPLES,
+                         dict_size: int = PAGE_ARCHIVE_DICT_SIZE) -> Optional[int]:
+        """
+        Trains a dictionary on the most recent blobs and makes it the one new blobs are
+        compressed with. Returns its id, or None if there were too few samples.
+        """
+        with self._lock:
+            if self._training:
+                return None
+            self._training = True
+        try:
+            with self._connect() as conn:
+                digests = [row[0] for row in conn.execute(
+                    "SELECT hash FROM blobs ORDER BY created_at DESC LIMIT ?", (max_samples,)
+                )]
+            samples: List[bytes] = [blob for blob in map(self.get_blob, digests) if blob]
+            if len(samples) < 10:
+                logger.info(f"Not enough archived pages to train a dictionary ({len(samples)})")
+                return None
+            try:
+                trained = zstandard.train_dictionary(dict_size, samples, level=self.level)
+            except zstandard.ZstdError as e:
+                logger.warning(f"Dictionary training failed: {e}")
+                return None
+            dict_id = trained.dict_id()
+            with open(self._dict_path(dict_id), "wb") as f:
+                f.write(trained.as_bytes())
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO archive_meta (name, value) VALUES ('dict_id', ?)", (str(dict_id),)
+                )
+            logger.info(f"Trained page archive dictionary {dict_id} on {len(samples)} samples")
+            return dict_id
+        finally:
+            with self._lock:
+                self._training = False
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            pages, urls = conn.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM pages").fetchone()
+            blobs, size, compressed = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(compressed_size), 0) FROM blobs"
+            ).fetchone()
+        return {
+            "pages": pages,
+            "urls": urls,
+            "blobs": blobs,
+            "bytes": size,
+            "compressed_bytes": compressed,
+            "compression_ratio": round(size / compressed, 2) if compressed else 0.0,
+            "dict_id": self._current_dict_id(),
+        }
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_page_archive() -> PageArchive:
+    """Returns the process-wide page archive."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = PageArchive()
+        return _archive
+
+
+def archive_page(url: str, text: Optional[str], html: Optional[str], tier: str, validators: Optional[Dict] = None):
+    """Archives a fetched page if archiving is enabled; never raises into the scraper."""
+    if not PAGE_ARCHIVE_ENABLED or not (text or html):
+        return
+    try:
+        get_page_archive().put(url, text, html, tier, validators=validators)
+    except Exception as e:
+        logger.warning(f"Page archive unavailable: {e}")
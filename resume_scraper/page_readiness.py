@@ -0,0 +1,146 @@
+# page_readiness.py
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import Optional
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from resume_scraper.resource_blocking import blocked_category
+
+logger = logging.getLogger(__name__)
+
+# A page is ready once the DOM, the network and the card count have all been quiet this long
+READY_QUIET_SECONDS = float(os.getenv("SCRAPER_READY_QUIET_SECONDS", "0.5"))
+READY_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_READY_TIMEOUT_SECONDS", "15"))
+READY_POLL_SECONDS = 0.1
+# Like "networkidle2": long-polling and beacon requests may stay open on otherwise loaded pages
+NETWORK_IDLE_MAX_IN_FLIGHT = int(os.getenv("SCRAPER_NETWORK_IDLE_MAX_IN_FLIGHT", "2"))
+
+# Injected into every document (Page.addScriptToEvaluateOnNewDocument): records the time of
+# the last DOM mutation so readiness checks can tell when rendering has settled
+MUTATION_OBSERVER_SCRIPT = """
+window.__lastMutationAt = performance.now();
+new MutationObserver(() => { window.__lastMutationAt = performance.now(); })
+    .observe(document, {childList: true, subtree: true, characterData: true});
+"""
+
+_PAGE_STATE_SCRIPT = """
+const selector = arguments[0];
+return [
+    document.readyState,
+    performance.now() - (window.__lastMutationAt || 0),
+    selector ? document.querySelectorAll(selector).length : 0
+];
+"""
+
+
+class NetworkActivity:
+    """
+    Tracks the requests of one page load from the CDP Network events that Chrome writes
+    to the "performance" log (enabled in create_webdriver): what is in flight for idle
+    detection, and bytes transferred / requests blocked for the page-load metrics.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.available = True
+        self.drain()
+
+    def _reset(self):
+        self.in_flight = {}
+        self.requests = 0
+        self.bytes_loaded = 0
+        self.blocked = Counter()
+        self.last_activity = time.monotonic()
+
+    def drain(self):
+        """Discards events of earlier pages and resets the counters."""
+        self._reset()
+        self.poll()
+        self._reset()
+
+    def _handle(self, method: str, params: dict) -> bool:
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            if request_id not in self.in_flight:
+                self.requests += 1
+            self.in_flight[request_id] = (params.get("type", ""), params.get("request", {}).get("url", ""))
+        elif method == "Network.loadingFinished":
+            self.in_flight.pop(request_id, None)
+            self.bytes_loaded += int(params.get("encodedDataLength") or 0)
+        elif method == "Network.loadingFailed":
+            resource_type, url = self.in_flight.pop(request_id, ("", ""))
+            if params.get("blockedReason"):
+                self.blocked[blocked_category(resource_type, url)] += 1
+        else:
+            return False
+        return True
+
+    def poll(self):
+        if not self.available:
+            return
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception as e:
+            logger.debug(f"Performance log unavailable, network idle detection disabled: {e}")
+            self.available = False
+            return
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            if self._handle(message.get("method", ""), message.get("params", {})):
+                self.last_activity = time.monotonic()
+
+    def idle_seconds(self) -> float:
+        """How long at most NETWORK_IDLE_MAX_IN_FLIGHT requests have been open (0 while busy)."""
+        if not self.available:
+            return float("inf")
+        if len(self.in_flight) > NETWORK_IDLE_MAX_IN_FLIGHT:
+            return 0.0
+        return time.monotonic() - self.last_activity
+
+
+class _PageSettled:
+    """WebDriverWait condition: document complete, DOM and network quiet, card count stable."""
+
+    def __init__(self, network: Optional[NetworkActivity], selector: Optional[str], quiet: float):
+        self.network = network
+        self.selector = selector
+        self.quiet = quiet
+        self.count = -1
+        self.count_changed_at = time.monotonic()
+
+    def __call__(self, driver) -> bool:
+        if self.network:
+            self.network.poll()
+        ready_state, dom_quiet_ms, count = driver.execute_script(_PAGE_STATE_SCRIPT, self.selector)
+        now = time.monotonic()
+        if count != self.count:
+            self.count = count
+            self.count_changed_at = now
+        return (
+            ready_state == "complete"
+            and dom_quiet_ms >= self.quiet * 1000
+            and now - self.count_changed_at >= self.quiet
+            and (self.network is None or self.network.idle_seconds() >= self.quiet)
+        )
+
+
+def wait_until_ready(driver, network: Optional[NetworkActivity] = None, selector: Optional[str] = None,
+                     timeout: float = READY_TIMEOUT_SECONDS, quiet: float = READY_QUIET_SECONDS) -> int:
+    """
+    Waits until the page has settled and returns the number of elements matching selector.
+    Returns on timeout too (with the current count); slow pages are used as far as they loaded.
+    """
+    condition = _PageSettled(network, selector, quiet)
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=READY_POLL_SECONDS).until(condition)
+    except TimeoutException:
+        logger.info(f"Page did not settle within {timeout:.0f}s; continuing with {max(condition.count, 0)} elements")
+    return max(condition.count, 0)
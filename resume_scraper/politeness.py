@@ -0,0 +1,115 @@
+# politeness.py
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# Crawl pacing per host, shared by every scraping thread in the process. This is the only
+# place scraping waits between requests; parsing, LLM extraction and DB writes never sleep.
+HOST_MAX_CONCURRENCY = int(os.getenv("SCRAPER_HOST_CONCURRENCY", "2"))
+HOST_REQUESTS_PER_MINUTE = float(os.getenv("SCRAPER_HOST_REQUESTS_PER_MINUTE", "20"))
+HOST_JITTER = float(os.getenv("SCRAPER_HOST_JITTER", "0.3"))  # +/- share of the spacing, so requests aren't metronomic
+BACKOFF_BASE_SECONDS = float(os.getenv("SCRAPER_BACKOFF_BASE_SECONDS", "5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("SCRAPER_BACKOFF_MAX_SECONDS", "300"))
+
+
+class _HostState:
+    __slots__ = ("semaphore", "next_request_at", "backoff_until", "consecutive_errors",
+                 "requests", "errors", "wait_seconds")
+
+    def __init__(self, concurrency: int):
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.next_request_at = 0.0
+        self.backoff_until = 0.0
+        self.consecutive_errors = 0
+        self.requests = 0
+        self.errors = 0
+        self.wait_seconds = 0.0
+
+
+class PolitenessScheduler:
+    """
+    Per-host crawl pacing: at most HOST_MAX_CONCURRENCY requests in flight to a host,
+    request starts spaced (with jitter) at HOST_REQUESTS_PER_MINUTE, and exponential
+    backoff for the whole host after errors (blocked responses, failed page loads, empty
+    results), cleared by the next success.
+    """
+
+    def __init__(self, concurrency: int = HOST_MAX_CONCURRENCY, requests_per_minute: float = HOST_REQUESTS_PER_MINUTE):
+        self.concurrency = concurrency
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str) -> _HostState:
+        host = urllib.parse.urlsplit(url).hostname or url
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = _HostState(self.concurrency)
+            return self._hosts[host]
+
+    @contextmanager
+    def slot(self, url: str):
+        """
+        Held for the duration of one request (page load) to url's host. Pacing only: callers
+        report the outcome with record_success / record_error, once per request.
+        """
+        state = self._host(url)
+        start = time.time()
+        state.semaphore.acquire()
+        try:
+            with self._lock:
+                # Reserve the next start time so concurrent callers queue behind each other
+                now = time.time()
+                start_at = max(now, state.next_request_at, state.backoff_until)
+                state.next_request_at = start_at + self.interval * random.uniform(1 - HOST_JITTER, 1 + HOST_JITTER)
+            if start_at > now:
+                time.sleep(start_at - now)
+            with self._lock:
+                state.requests += 1
+                state.wait_seconds += time.time() - start
+            yield
+        finally:
+            state.semaphore.release()
+
+    def record_error(self, url: str):
+        """Reports a failed request (an exception, a 429/999 status or an empty result page)."""
+        state = self._host(url)
+        with self._lock:
+            state.errors += 1
+            state.consecutive_errors += 1
+            delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (state.consecutive_errors - 1))
+            delay = random.uniform(delay / 2, delay)
+            state.backoff_until = max(state.backoff_until, time.time() + delay)
+        logger.warning(f"Backing off {urllib.parse.urlsplit(url).hostname} for {delay:.1f}s "
+                       f"after {state.consecutive_errors} consecutive errors")
+
+    def record_success(self, url: str):
+        state = self._host(url)
+        with self._lock:
+            state.consecutive_errors = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                host: {
+                    "requests": state.requests,
+                    "errors": state.errors,
+                    "wait_seconds": round(state.wait_seconds, 3),
+                    "backing_off": state.backoff_until > time.time(),
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+_scheduler = PolitenessScheduler()
+
+
+def get_politeness_scheduler() -> PolitenessScheduler:
+    return _scheduler
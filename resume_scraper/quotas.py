@@ -0,0 +1,210 @@
+# quotas.py
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Per-client LLM budgets, counted in LLM calls (one resume parse, one summary, one job match, ...)
+SESSION_CALLS_PER_MINUTE = float(os.getenv("QUOTA_SESSION_CALLS_PER_MINUTE", "30"))
+SESSION_BURST = float(os.getenv("QUOTA_SESSION_BURST", "60"))
+IP_CALLS_PER_MINUTE = float(os.getenv("QUOTA_IP_CALLS_PER_MINUTE", "90"))  # several users can share one IP
+IP_BURST = float(os.getenv("QUOTA_IP_BURST", "180"))
+FAIR_QUEUE_SLOTS = int(os.getenv("QUOTA_FAIR_QUEUE_SLOTS", "4"))
+# Buckets that refilled completely are forgotten (a new one starts full anyway); swept this often
+BUCKET_SWEEP_SECONDS = float(os.getenv("QUOTA_BUCKET_SWEEP_SECONDS", "60"))
+
+# LLM calls an upload makes besides job scoring (parse, summary, interests, resume keywords),
+# and the jobs that get a written match reasoning afterwards
+UPLOAD_FIXED_CALLS = 4
+MATCH_REASONING_TOP_N = 5
+# Jobs scored by the LLM per upload (the best lexical matches; the rest keep their lexical
+# rank). Capped so that one upload's worst case fits in a fresh session bucket.
+LLM_MATCH_CANDIDATES = max(1, min(
+    int(os.getenv("QUOTA_LLM_MATCH_CANDIDATES", "20")),
+    int(SESSION_BURST) - UPLOAD_FIXED_CALLS - MATCH_REASONING_TOP_N
+))
+
+# The client on whose behalf LLM calls in the current thread / task are made
+_current_user = contextvars.ContextVar("quota_user", default=None)
+
+
+@contextmanager
+def user_context(user_id: str):
+    """Attributes the enclosed LLM calls to user_id for fair queuing."""
+    token = _current_user.set(user_id)
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
+
+
+def match_cost(candidates: int, reasoning_top_n: int = MATCH_REASONING_TOP_N) -> int:
+    """LLM calls match_resume_to_jobs makes: resume keywords, one score per job, the reasonings."""
+    return 1 + candidates + min(reasoning_top_n, candidates)
+
+
+def current_user():
+    return _current_user.get()
+
+
+class TokenBucket:
+    """Classic token bucket: refills at rate tokens per second up to capacity."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+class QuotaManager:
+    """
+    Per-session and per-IP token buckets for LLM work.
+    A request must fit in every bucket it is charged to; callers degrade (rather than reject)
+    when it does not.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._usage = defaultdict(lambda: {"llm_calls": 0, "degraded": 0})
+        self._lock = threading.Lock()
+        self._swept_at = time.monotonic()
+        self.evicted = 0
+
+    def _sweep(self):
+        """Drops the buckets (and usage) of clients that have been idle long enough to refill."""
+        now = time.monotonic()
+        if now - self._swept_at < BUCKET_SWEEP_SECONDS:
+            return
+        self._swept_at = now
+        for key, bucket in list(self._buckets.items()):
+            bucket.refill()
+            if bucket.tokens >= bucket.capacity:
+                del self._buckets[key]
+                self._usage.pop(key, None)
+                self.evicted += 1
+
+    def _bucket(self, key: str) -> TokenBucket:
+        if key not in self._buckets:
+            if key.startswith("ip:"):
+                self._buckets[key] = TokenBucket(IP_CALLS_PER_MINUTE / 60.0, IP_BURST)
+            else:
+                self._buckets[key] = TokenBucket(SESSION_CALLS_PER_MINUTE / 60.0, SESSION_BURST)
+        return self._buckets[key]
+
+    def try_consume(self, keys: List[str], cost: float) -> bool:
+        """Deducts cost from every bucket in keys if all of them can afford it."""
+        with self._lock:
+            self._sweep()
+            buckets = [self._bucket(key) for key in keys]
+            for bucket in buckets:
+                bucket.refill()
+            if all(bucket.tokens >= cost for bucket in buckets):
+                for bucket in buckets:
+                    bucket.tokens -= cost
+                for key in keys:
+                    self._usage[key]["llm_calls"] += cost
+                return True
+            for key in keys:
+                self._usage[key]["degraded"] += 1
+            logger.info(f"Quota exceeded for {keys} (cost {cost}); degrading request")
+            return False
+
+    def consume(self, keys: List[str], cost: float):
+        """Charges work that cannot be degraded (e.g. resume parsing); buckets may go negative."""
+        with self._lock:
+            self._sweep()
+            for key in keys:
+                bucket = self._bucket(key)
+                bucket.refill()
+                bucket.tokens -= cost
+                self._usage[key]["llm_calls"] += cost
+
+    def stats(self) -> Dict:
+        with self._lock:
+            for bucket in self._buckets.values():
+                bucket.refill()
+            return {
+                key: {**usage, "tokens_left": round(self._buckets[key].tokens, 1)}
+                for key, usage in self._usage.items()
+                if key in self._buckets
+            }
+
+
+class FairQueue:
+    """
+    Weighted fair queuing for inference slots within this process.
+    Each user's requests get virtual finish times (start + cost / weight); free slots go to
+    the waiting request with the smallest finish time, so a user with many queued calls
+    cannot starve someone who only needs one.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._free = slots
+        self._cond = threading.Condition()
+        self._heap = []
+        self._virtual_time = 0.0
+        self._finish_times: Dict[str, float] = {}
+        self._seq = itertools.count()
+
+    @contextmanager
+    def slot(self, user_id: str, weight: float = 1.0, cost: float = 1.0):
+        with self._cond:
+            start = max(self._virtual_time, self._finish_times.get(user_id, 0.0))
+            finish = start + cost / weight
+            self._finish_times[user_id] = finish
+            ticket = (finish, next(self._seq))
+            heapq.heappush(self._heap, ticket)
+            while not (self._free > 0 and self._heap[0] == ticket):
+                self._cond.wait()
+            heapq.heappop(self._heap)
+            self._free -= 1
+            self._virtual_time = finish
+            if not self._heap:
+                # Idle: forget old finish times so they don't penalise returning users
+                self._finish_times.clear()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._free += 1
+                self._cond.notify_all()
+
+    def waiting(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "busy": self.slots - self._free,
+                "waiting": len(self._heap),
+                "users": len(self._finish_times),
+            }
+
+
+_quota_manager = QuotaManager()
+_fair_queue = FairQueue(FAIR_QUEUE_SLOTS)
+
+
+def get_quota_manager() -> QuotaManager:
+    return _quota_manager
+
+
+def get_fair_queue() -> FairQueue:
+    return _fair_queue
@@ -0,0 +1,231 @@
+# rate_limiter.py
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Shared by every thread and gunicorn worker on this host through one SQLite file
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", os.path.join(_PROJECT_ROOT, "instance", "rate_limits.db"))
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "15"))
+GEMINI_TOKENS_PER_MINUTE = float(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000"))
+GEMINI_EXPECTED_OUTPUT_TOKENS = int(os.getenv("GEMINI_EXPECTED_OUTPUT_TOKENS", "1024"))
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY_SECONDS = 1.0
+RETRY_MAX_DELAY_SECONDS = 30.0
+# Wall-clock budget for all attempts of one call together, backoff sleeps included
+RETRY_DEADLINE_SECONDS = float(os.getenv("LLM_RETRY_DEADLINE_SECONDS", "120"))
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class SharedRateLimiter:
+    """
+    Token buckets for requests per minute and tokens per minute, stored in SQLite so that
+    every process on the host draws from the same budget. A call must fit in both buckets.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float, path: str = RATE_LIMIT_PATH):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.path = path
+        self.wait_seconds = 0.0
+        self.waits = 0
+        self.acquired = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    name TEXT PRIMARY KEY,
+                    requests REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "INSERT OR IGNORE INTO rate_buckets (name, requests, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                (self.name, self.requests_per_minute, self.tokens_per_minute, time.time())
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def _refilled(self, conn, now: float):
+        requests, tokens, updated_at = conn.execute(
+            "SELECT requests, tokens, updated_at FROM rate_buckets WHERE name = ?", (self.name,)
+        ).fetchone()
+        elapsed = max(0.0, now - updated_at)
+        requests = min(self.requests_per_minute, requests + elapsed * self.requests_per_minute / 60.0)
+        tokens = min(self.tokens_per_minute, tokens + elapsed * self.tokens_per_minute / 60.0)
+        return requests, tokens
+
+    def _try_acquire(self, cost_tokens: float) -> float:
+        """Takes one request and cost_tokens if available; otherwise returns the seconds to wait."""
+        now = time.time()
+        # A single call larger than the whole minute budget can never fit; let it through at a full bucket
+        cost_tokens = min(cost_tokens, self.tokens_per_minute)
+        with self._connect() as conn:
+            requests, tokens = self._refilled(conn, now)
+            if requests >= 1 and tokens >= cost_tokens:
+                conn.execute(
+                    "UPDATE rate_buckets SET requests = ?, tokens = ?, updated_at = ? WHERE name = ?",
+                    (requests - 1, tokens - cost_tokens, now, self.name)
+                )
+                return 0.0
+            request_wait = (1 - requests) * 60.0 / self.requests_per_minute if requests < 1 else 0.0
+            token_wait = (cost_tokens - tokens) * 60.0 / self.tokens_per_minute if tokens < cost_tokens else 0.0
+            return max(request_wait, token_wait)
+
+    def acquire(self, cost_tokens: float) -> float:
+        """Blocks until the call fits in both buckets; returns the time spent waiting."""
+        start = time.time()
+        throttled = False
+        while True:
+            wait = self._try_acquire(cost_tokens)
+            if wait <= 0:
+                break
+            throttled = True
+            # Re-check at least once a second: other processes may return unused tokens
+            time.sleep(min(wait, 1.0) + random.uniform(0, 0.05))
+        waited = time.time() - start if throttled else 0.0
+        with self._lock:
+            self.acquired += 1
+            if throttled:
+                self.waits += 1
+                self.wait_seconds += waited
+        if waited > 1:
+            logger.info(f"{self.name} rate limiter waited {waited:.1f}s")
+        return waited
+
+    def settle(self, estimated_tokens: float, actual_tokens: Optional[float]):
+        """Corrects the token bucket once the real token usage of a call is known."""
+        if actual_tokens is None:
+            return
+        delta = estimated_tokens - actual_tokens
+        with self._connect() as conn:
+            requests, tokens = self._refilled(conn, time.time())
+            conn.execute(
+                "UPDATE rate_buckets SET requests = ?, tokens = ?, updated_at = ? WHERE name = ?",
+                (requests, min(self.tokens_per_minute, tokens + delta), time.time(), self.name)
+            )
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "acquired": self.acquired,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "retries": self.retries,
+            }
+
+
+def estimate_tokens(prompt_text: str, expected_output_tokens: int = GEMINI_EXPECTED_OUTPUT_TOKENS) -> int:
+    """Rough token estimate (~4 characters per token) for budgeting before the call."""
+    return len(prompt_text) // 4 + expected_output_tokens
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    True for rate-limit (429) and server-side (5xx) errors. A timed-out call (DeadlineExceeded,
+    which google.api_core reports as 504) is not retried: it already used its whole timeout.
+    """
+    if error.__class__.__name__ == "DeadlineExceeded":
+        return False
+    code = getattr(error, "code", None)  # HTTP status on google.api_core errors
+    return code in RETRYABLE_STATUS_CODES or error.__class__.__name__ in (
+        "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError"
+    )
+
+
+def _backoff_delay(attempt: int) -> float:
+    # Full jitter: spreads retries from concurrent workers instead of synchronising them
+    return random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * (2 ** attempt)))
+
+
+def _retry_delay(error: Exception, attempt: int, deadline: float, attempt_timeout: float) -> Optional[float]:
+    """Backoff before the next attempt, or None when the error is final or the retry would overrun the deadline."""
+    if not is_retryable(error) or attempt == RETRY_MAX_ATTEMPTS - 1:
+        return None
+    delay = _backoff_delay(attempt)
+    if time.monotonic() + delay + attempt_timeout > deadline:
+        logger.warning(f"LLM retry budget of {RETRY_DEADLINE_SECONDS:.0f}s exhausted after {attempt + 1} attempt(s)")
+        return None
+    return delay
+
+
+def call_with_retry(call: Callable[[], str], limiter: Optional[SharedRateLimiter] = None,
+                    attempt_timeout: float = 0.0) -> str:
+    """
+    Runs call(), retrying 429/5xx errors with jittered exponential backoff. A retry is only
+    started if its backoff plus attempt_timeout (the per-call timeout) still fits within
+    RETRY_DEADLINE_SECONDS of the first attempt.
+    """
+    deadline = time.monotonic() + RETRY_DEADLINE_SECONDS
+    for attempt in range(RETRY_MAX_ATTEMPTS):
+        try:
+            return call()
+        except Exception as e:
+            delay = _retry_delay(e, attempt, deadline, attempt_timeout)
+            if delay is None:
+                raise
+            if limiter:
+                limiter.record_retry()
+            logger.warning(f"Retryable LLM error ({e}); retry {attempt + 1}/{RETRY_MAX_ATTEMPTS - 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+async def call_with_retry_async(call: Callable[[], Awaitable[str]], limiter: Optional[SharedRateLimiter] = None,
+                                attempt_timeout: float = 0.0) -> str:
+    """Async variant of call_with_retry."""
+    deadline = time.monotonic() + RETRY_DEADLINE_SECONDS
+    for attempt in range(RETRY_MAX_ATTEMPTS):
+        try:
+            return await call()
+        except Exception as e:
+            delay = _retry_delay(e, attempt, deadline, attempt_timeout)
+            if delay is None:
+                raise
+            if limiter:
+                limiter.record_retry()
+            logger.warning(f"Retryable LLM error ({e}); retry {attempt + 1}/{RETRY_MAX_ATTEMPTS - 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+_gemini_limiter = None
+_gemini_limiter_lock = threading.Lock()
+
+
+def get_gemini_limiter() -> SharedRateLimiter:
+    """Returns the limiter for the Gemini API quota."""
+    global _gemini_limiter
+    with _gemini_limiter_lock:
+        if _gemini_limiter is None:
+            _gemini_limiter = SharedRateLimiter("gemini", GEMINI_REQUESTS_PER_MINUTE, GEMINI_TOKENS_PER_MINUTE)
+        return _gemini_limiter
@@ -0,0 +1,100 @@
+# resource_blocking.py
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Resource types the scraper never needs; "stylesheet" can be added, at the cost of layout-dependent checks
+BLOCKED_RESOURCE_TYPES = [
+    t.strip().lower() for t in os.getenv("SCRAPER_BLOCKED_RESOURCE_TYPES", "image,font,media,tracking").split(",")
+    if t.strip()
+]
+# Extra wildcard patterns, e.g. SCRAPER_BLOCKED_URL_PATTERNS="*://*.example-ads.com/*,*.svg"
+EXTRA_BLOCKED_URL_PATTERNS = [p.strip() for p in os.getenv("SCRAPER_BLOCKED_URL_PATTERNS", "").split(",") if p.strip()]
+
+# Network.setBlockedURLs matches URL wildcards only, so each resource type maps to the
+# extensions and hosts that serve it
+RESOURCE_TYPE_URL_PATTERNS: Dict[str, List[str]] = {
+    "image": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.ico", "*.svg", "*://media.licdn.com/dms/image/*"],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media": ["*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg", "*://dms.licdn.com/playlist/*"],
+    "stylesheet": ["*.css"],
+    "tracking": [
+        "*://*.google-analytics.com/*", "*://*.googletagmanager.com/*", "*://*.doubleclick.net/*",
+        "*://*.facebook.net/*", "*://*.hotjar.com/*", "*://*.ads.linkedin.com/*",
+        "*://px.ads.linkedin.com/*", "*://snap.licdn.com/li.lms-analytics/*", "*/li/track*",
+    ],
+}
+
+# Chrome's Network.requestWillBeSent "type" for each blockable resource type (for metrics)
+_CDP_TYPES = {"Image": "image", "Font": "font", "Media": "media", "Stylesheet": "stylesheet"}
+
+# Typical transfer sizes (bytes) used to estimate what blocking saved; blocked requests never report a size
+ESTIMATED_BYTES = {"image": 20_000, "font": 30_000, "media": 250_000, "stylesheet": 15_000, "tracking": 5_000, "other": 10_000}
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def blocked_url_patterns() -> List[str]:
+    patterns = []
+    for resource_type in BLOCKED_RESOURCE_TYPES:
+        if resource_type not in RESOURCE_TYPE_URL_PATTERNS:
+            logger.warning(f"Unknown blocked resource type: {resource_type}")
+            continue
+        patterns += RESOURCE_TYPE_URL_PATTERNS[resource_type]
+    return patterns + EXTRA_BLOCKED_URL_PATTERNS
+
+
+def apply_resource_blocking(driver):
+    """Installs the blocklist on a browser; it stays active for every page the browser loads."""
+    patterns = blocked_url_patterns()
+    if not patterns:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        logger.warning(f"Could not install resource blocklist: {e}")
+
+
+def blocked_category(cdp_type: str, url: str) -> str:
+    for pattern in RESOURCE_TYPE_URL_PATTERNS["tracking"]:
+        host_part = pattern.split("://")[-1].split("/")[0].lstrip("*.")
+        if host_part and host_part in url:
+            return "tracking"
+    return _CDP_TYPES.get(cdp_type, "other")
+
+
+def record_page_load(url: str, load_seconds: float, network) -> Dict:
+    """Adds one page's transfer figures (from a page_readiness.NetworkActivity) to the totals."""
+    network.poll()
+    page = {
+        "load_seconds": round(load_seconds, 3),
+        "bytes_loaded": network.bytes_loaded,
+        "requests": network.requests,
+        "blocked_requests": sum(network.blocked.values()),
+        "estimated_bytes_saved": sum(ESTIMATED_BYTES.get(c, ESTIMATED_BYTES["other"]) * n for c, n in network.blocked.items()),
+    }
+    logger.info(f"Page load {url}: {page}")
+    with _stats_lock:
+        _stats["pages"] += 1
+        _stats["load_seconds"] += load_seconds
+        for key in ("bytes_loaded", "requests", "blocked_requests", "estimated_bytes_saved"):
+            _stats[key] += page[key]
+        for category, count in network.blocked.items():
+            _stats[f"blocked_{category}"] += count
+    return page
+
+
+def blocking_stats() -> Dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    pages = stats.get("pages", 0)
+    if pages:
+        stats["avg_load_seconds"] = round(stats.pop("load_seconds") / pages, 3)
+        stats["avg_bytes_per_page"] = stats.get("bytes_loaded", 0) // pages
+    return stats
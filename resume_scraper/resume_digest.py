@@ -0,0 +1,140 @@
+# resume_digest.py
+import hashlib
+import json
+import re
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from resume_scraper.skills import resume_skills
+
+_MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1
+)}
+_DATE_PATTERN = re.compile(
+    r"(?:(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+|(\d{1,2})[/-])?((?:19|20)\d{2})"
+    r"|(present|current|now|today|ongoing)"
+)
+_SPAN_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(years?|yrs?|months?|mos?)\b")
+
+# Highest level first; the first level whose pattern matches any degree wins. Two-letter
+# abbreviations count only dotted ("b.s.") or in capitals ("BS"), so words such as "be",
+# "me" or "see" in a major don't register as degrees.
+EDUCATION_LEVELS: List[Tuple[str, re.Pattern]] = [
+    ("Doctorate", re.compile(r"\b(?i:ph\.?\s?d|doctor(?:ate)?|d\.?phil)(?!\w)")),
+    ("Master's", re.compile(
+        r"\b(?i:master'?s?|m\.?\s?sc|mba|m\.?\s?tech|mca|m\.\s?[sae]\.?)(?!\w)|\b(?:MS|MA|ME)\b"
+    )),
+    ("Bachelor's", re.compile(
+        r"\b(?i:bachelor'?s?|b\.?\s?sc|bba|b\.?\s?tech|bca|b\.?\s?com|undergraduate|b\.\s?[sae]\.?)(?!\w)"
+        r"|\b(?:BS|BA|BE)\b"
+    )),
+    ("Diploma", re.compile(r"\b(?i:diploma|associate'?s?)(?!\w)")),
+    ("High School", re.compile(r"\b(?i:high school|a[- ]levels?|secondary|slc)(?!\w)|\+2\b")),
+]
+
+
+def _month_index(month: Optional[str], numeric_month: Optional[str], year: str) -> int:
+    if month:
+        month_number = _MONTHS[month[:3]]
+    elif numeric_month and 1 <= int(numeric_month) <= 12:
+        month_number = int(numeric_month)
+    else:
+        month_number = 1
+    return int(year) * 12 + month_number - 1
+
+
+def _duration_interval(duration: str, today: date) -> Optional[Tuple[int, int]]:
+    """(start, end) in absolute months for "Jan 2020 - Dec 2022", "2019 - Present", ..."""
+    points = []
+    for month, numeric_month, year, ongoing in _DATE_PATTERN.findall(duration.lower()):
+        if ongoing:
+            points.append(today.year * 12 + today.month - 1)
+        else:
+            points.append(_month_index(month, numeric_month, year))
+    if len(points) >= 2 and points[1] >= points[0]:
+        return points[0], points[1] + 1
+    return None
+
+
+def years_of_experience(work_experience: Iterable[Dict], today: Optional[date] = None) -> Optional[int]:
+    """
+    Completed years across work experience entries, merging overlapping date ranges.
+    Entries given as a span ("2 years", "18 months") are added as-is. None if nothing parses.
+    Whole years keep a resume with a "Present" role from changing (and missing the LLM
+    cache) every month; it changes once a year instead.
+    """
+    today = today or date.today()
+    intervals, span_months = [], 0.0
+    for entry in work_experience or []:
+        if not isinstance(entry, dict):
+            continue
+        duration = str(entry.get("Duration") or "")
+        interval = _duration_interval(duration, today)
+        if interval:
+            intervals.append(interval)
+            continue
+        span = _SPAN_PATTERN.search(duration.lower())
+        if span:
+            amount = float(span.group(1))
+            span_months += amount * 12 if span.group(2).startswith("y") else amount
+
+    months, current_end = 0, None
+    for start, end in sorted(intervals):
+        if current_end is not None and start < current_end:
+            start = current_end
+        if end > start:
+            months += end - start
+            current_end = end
+    total = months + span_months
+    return int(total // 12) if (intervals or span_months) else None
+
+
+def education_level(education: Iterable[Dict]) -> str:
+    """Highest degree level named in the Education entries, or an empty string."""
+    degrees = " | ".join(
+        f"{entry.get('Degree') or ''} {entry.get('Major') or ''}"
+        for entry in education or [] if isinstance(entry, dict)
+    )
+    for level, pattern in EDUCATION_LEVELS:
+        if pattern.search(degrees):
+            return level
+    return ""
+
+
+def build_resume_digest(resume_data: Dict, keywords: Iterable[str] = ()) -> Dict:
+    """
+    Compact, stable representation of a parsed resume for matching prompts: canonical skills,
+    job titles, years of experience, education level and certifications. Contact details, URLs
+    and free-text descriptions are left out. Equal inputs give byte-identical digests, so the
+    prompts built from them hit the LLM response cache; digest_hash identifies the content.
+    """
+    titles = []
+    for entry in resume_data.get("Work Experience") or []:
+        title = str(entry.get("Position") or "").strip() if isinstance(entry, dict) else ""
+        if title and title not in titles:
+            titles.append(title)
+
+    digest = {
+        "titles": titles,
+        "years_experience": years_of_experience(resume_data.get("Work Experience")),
+        "education": education_level(resume_data.get("Education")),
+        "majors": sorted({
+            str(entry.get("Major")).strip() for entry in resume_data.get("Education") or []
+            if isinstance(entry, dict) and entry.get("Major")
+        }),
+        "skills": sorted(resume_skills(resume_data, keywords)),
+        "certifications": sorted({str(c).strip() for c in resume_data.get("Certifications") or [] if str(c).strip()}),
+    }
+    digest = {key: value for key, value in digest.items() if value not in (None, "", [])}
+    digest["digest_hash"] = hashlib.sha256(
+        json.dumps(digest, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()[:16]
+    return digest
+
+
+def resume_digest_json(digest: Dict) -> str:
+    """The digest as compact JSON for prompts (without the hash, which carries no meaning for the model)."""
+    return json.dumps(
+        {key: value for key, value in digest.items() if key != "digest_hash"},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
@@ -1,12 +1,18 @@
 
 # resume_praser.py
 import google.generativeai as genai
+import asyncio
 import os
 import json
 import re
 import logging
+import threading
 from pypdf import PdfReader
-from typing import List
+from typing import List, Optional, Tuple
+
+from resume_scraper.circuit_breaker import get_breaker
+from resume_scraper.llm_cache import cached_invoke, cached_invoke_async
+from resume_scraper.rate_limiter import call_with_retry, call_with_retry_async, estimate_tokens, get_gemini_limiter, is_retryable
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,6 +30,175 @@ if not api_key:
 else:
     genai.configure(api_key=api_key)
 
+GEMINI_MODEL_NAME = "gemini-2.0-flash"
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+
+DEFAULT_CAREER_INTERESTS = ("IT", "Administration", "Sales", "Customer Service")
+
+ATS_PROMPT = """
+    You are an ATS (Applicant Tracking System) that reads resumes and extracts relevant information.
+    From the given resume data, extract the following information and return it in valid JSON format:
+    {
+        "Full Name": "",
+        "Email Address": "",
+        "Phone Number": "",
+        "LinkedIn Profile URL": "",
+        "Education": [
+            {
+                "Degree": "",
+                "Major": "",
+                "University": "",
+                "Years": ""
+            }
+        ],
+        "Work Experience": [
+            {
+                "Company": "",
+                "Position": "",
+                "Duration": "",
+                "Description": ""
+            }
+        ],
+        "Technical Skills": [],
+        "Soft Skills": [],
+        "Certifications": [],
+        "Projects": [
+            {
+                "Name": "",
+                "Description": "",
+                "Technologies": [],
+                "URL": ""
+            }
+        ],
+        "Summary_or_Objective": ""
+    }
+    
+    IMPORTANT:
+    1. Return ONLY valid JSON format (no surrounding text or markdown, no introductory or concluding sentences).
+    2. Ensure all strings are properly escaped (e.g., double quotes, backslashes).
+    3. Education should be an array of objects, each with Degree, Major, University, and Years.
+    4. Work Experience should include company, position, duration (e.g., "Jan 2020 - Dec 2022"), and a brief description of responsibilities/achievements.
+    5. Projects should include name, description, technologies used (as a list), and URL (if available).
+    6. "Technical Skills" and "Soft Skills" should be lists of individual skills.
+    7. "Certifications" should be a list of certification names.
+    8. "Summary_or_Objective" should capture the candidate's personal summary or objective statement.
+    9. If information is missing, use empty arrays, empty strings, or null as appropriate.
+    10. Pay special attention to extracting all projects mentioned in the resume.
+    """
+
+SUMMARY_PROMPT = """
+    Based on the following structured resume data, write a concise, professional summary (around 3-5 sentences) that highlights the candidate's key qualifications, experience, and skills relevant for job applications. Focus on their strongest assets and career focus.
+
+    Resume Data (JSON):
+    {resume_json}
+
+    Summary:
+    """
+
+CAREER_INTERESTS_PROMPT = """
+    Analyze the following structured resume data. Based on the candidate's education, work experience, technical skills, soft skills, and projects, infer 3-5 by key words(e.g., "Software Developer","Python", "Data", "A.I" "Markating", "Data Analysis", "Customer Service", "Education", "Healthcare", "Admin Support"). Return ONLY a valid JSON array of these keywords. Do not include any introductory or concluding text, or markdown code block fences.
+
+    Resume Data (JSON):
+    {resume_json}
+
+    Return: []
+    """
+
+_gemini_models = {}
+_gemini_lock = threading.Lock()
+_gemini_loop = None
+
+def get_gemini_model(model_name=GEMINI_MODEL_NAME):
+    """
+    Returns a shared GenerativeModel for model_name. Reusing it keeps the underlying
+    client and its channel alive instead of setting them up again for every call.
+    """
+    with _gemini_lock:
+        if model_name not in _gemini_models:
+            _gemini_models[model_name] = genai.GenerativeModel(model_name)
+        return _gemini_models[model_name]
+
+def run_gemini_coroutine(coro, timeout=None):
+    """
+    Runs a coroutine from the *_async helpers on a long-lived event loop and waits for it.
+    The async gRPC channel is bound to the loop that created it, so all async Gemini calls
+    share one loop in a background thread rather than a fresh asyncio.run() per call.
+    """
+    global _gemini_loop
+    with _gemini_lock:
+        if _gemini_loop is None:
+            _gemini_loop = asyncio.new_event_loop()
+            threading.Thread(target=_gemini_loop.run_forever, name="gemini-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _gemini_loop).result(timeout)
+
+def _contents(prompt_text):
+    return [{"role": "user", "parts": [prompt_text]}]
+
+def _usage_tokens(response):
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", None) if usage else None
+
+# Transport failures of the HTTP / gRPC clients underneath google-generativeai that carry no status code
+_TRANSPORT_ERROR_NAMES = {"RetryError", "TransportError", "ConnectError", "ConnectTimeout", "ReadTimeout", "RemoteProtocolError"}
+
+def _is_gemini_outage(error):
+    """
+    Transport errors, quota exhaustion and 5xx count against the Gemini circuit. Anything
+    Gemini answered (other 4xx, a safety-blocked response whose .text raises ValueError)
+    is about the request, not the backend, and doesn't.
+    """
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    return (
+        isinstance(error, (OSError, asyncio.TimeoutError))
+        or error.__class__.__name__ in _TRANSPORT_ERROR_NAMES
+        or is_retryable(error)
+    )
+
+def _call_gemini(prompt_text, timeout):
+    """
+    One rate-limited Gemini call, retried with jittered backoff on 429/5xx within the retry budget.
+    Fails immediately with CircuitOpenError while Gemini is known to be down.
+    """
+    model = get_gemini_model()
+    limiter = get_gemini_limiter()
+    estimated_tokens = estimate_tokens(prompt_text)
+
+    def attempt():
+        limiter.acquire(estimated_tokens)
+        response = model.generate_content(_contents(prompt_text), request_options={"timeout": timeout})
+        limiter.settle(estimated_tokens, _usage_tokens(response))
+        return response.text
+
+    return get_breaker("gemini").call(lambda: call_with_retry(attempt, limiter, attempt_timeout=timeout), is_failure=_is_gemini_outage)
+
+def generate_text(prompt_text, timeout=GEMINI_TIMEOUT_SECONDS):
+    """
+    Sends a single user prompt to Gemini and returns the response text.
+    Responses are served from the shared LLM cache when the same prompt was seen before.
+    """
+    return cached_invoke(GEMINI_MODEL_NAME, {}, prompt_text, lambda: _call_gemini(prompt_text, timeout))
+
+async def generate_text_async(prompt_text, timeout=GEMINI_TIMEOUT_SECONDS):
+    """Async variant of generate_text built on generate_content_async."""
+    model = get_gemini_model()
+    limiter = get_gemini_limiter()
+    estimated_tokens = estimate_tokens(prompt_text)
+
+    async def attempt():
+        await asyncio.to_thread(limiter.acquire, estimated_tokens)
+        response = await model.generate_content_async(_contents(prompt_text), request_options={"timeout": timeout})
+        await asyncio.to_thread(limiter.settle, estimated_tokens, _usage_tokens(response))
+        return response.text
+
+    return await cached_invoke_async(
+        GEMINI_MODEL_NAME, {}, prompt_text,
+        lambda: get_breaker("gemini").call_async(
+            lambda: call_with_retry_async(attempt, limiter, attempt_timeout=timeout), is_failure=_is_gemini_outage
+        )
+    )
+
 def clean_json_response(text):
     """
     Cleans the AI response to extract valid JSON content.
@@ -83,82 +258,24 @@ def ats_extractor(resume_data_text):
     Returns:
         dict: A dictionary containing extracted information.
     """
-    prompt = """
-    You are an ATS (Applicant Tracking System) that reads resumes and extracts relevant information.
-    From the given resume data, extract the following information and return it in valid JSON format:
-    {
-        "Full Name": "",
-        "Email Address": "",
-        "Phone Number": "",
-        "LinkedIn Profile URL": "",
-        "Education": [
-            {
-                "Degree": "",
-                "Major": "",
-                "University": "",
-                "Years": ""
-            }
-        ],
-        "Work Experience": [
-            {
-                "Company": "",
-                "Position": "",
-                "Duration": "",
-                "Description": ""
-            }
-        ],
-        "Technical Skills": [],
-        "Soft Skills": [],
-        "Certifications": [],
-        "Projects": [
-            {
-                "Name": "",
-                "Description": "",
-                "Technologies": [],
-                "URL": ""
-            }
-        ],
-        "Summary_or_Objective": ""
-    }
-    
-    IMPORTANT:
-    1. Return ONLY valid JSON format (no surrounding text or markdown, no introductory or concluding sentences).
-    2. Ensure all strings are properly escaped (e.g., double quotes, backslashes).
-    3. Education should be an array of objects, each with Degree, Major, University, and Years.
-    4. Work Experience should include company, position, duration (e.g., "Jan 2020 - Dec 2022"), and a brief description of responsibilities/achievements.
-    5. Projects should include name, description, technologies used (as a list), and URL (if available).
-    6. "Technical Skills" and "Soft Skills" should be lists of individual skills.
-    7. "Certifications" should be a list of certification names.
-    8. "Summary_or_Objective" should capture the candidate's personal summary or objective statement.
-    9. If information is missing, use empty arrays, empty strings, or null as appropriate.
-    10. Pay special attention to extracting all projects mentioned in the resume.
-    """
-    
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    
     try:
-        response = model.generate_content([
-            {"role": "user", 
-             "parts": [f"{prompt} \n\n Resume Text:\n {resume_data_text}"]}
-        ])
-        
-        cleaned_response_text = clean_json_response(response.text)
-        parsed_data = json.loads(cleaned_response_text)
-        return parsed_data
-        
+        response_text = generate_text(f"{ATS_PROMPT} \n\n Resume Text:\n {resume_data_text}")
+    except Exception as e:
+        logger.error(f"General error in AI processing for ATS extractor: {str(e)}")
+        return {"error": str(e), "raw_response": None}
+    return _parse_ats_response(response_text)
+
+def _parse_ats_response(response_text):
+    cleaned_response_text = clean_json_response(response_text)
+    try:
+        return json.loads(cleaned_response_text)
     except json.JSONDecodeError as je:
         logger.error(f"JSON Decode Error in ATS extractor: {je}")
         logger.error(f"Problematic JSON string: {cleaned_response_text[:500]}...")
         return {
             "error": f"JSON parsing failed: {je}",
-            "raw_response": response.text if 'response' in locals() else None,
-            "cleaned_response_attempt": cleaned_response_text if 'cleaned_response_text' in locals() else None
-        }
-    except Exception as e:
-        logger.error(f"General error in AI processing for ATS extractor: {str(e)}")
-        return {
-            "error": str(e),
-            "raw_response": response.text if 'response' in locals() else None
+            "raw_response": response_text,
+            "cleaned_response_attempt": cleaned_response_text
         }
 
 def generate_resume_summary(parsed_resume_data: dict) -> str:
@@ -171,39 +288,35 @@ def generate_resume_summary(parsed_resume_data: dict) -> str:
     Returns:
         str: A summary of the resume.
     """
-    prompt = """
-    Based on the following structured resume data, write a concise, professional summary (around 3-5 sentences) that highlights the candidate's key qualifications, experience, and skills relevant for job applications. Focus on their strongest assets and career focus.
-
-    Resume Data (JSON):
-    {resume_json}
-
-    Summary:
-    """
-    
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    
     try:
         # Convert the dictionary to a pretty-printed JSON string for the prompt
         resume_json_str = json.dumps(parsed_resume_data, indent=2)
-        
-        response = model.generate_content([
-            {"role": "user", 
-             "parts": [prompt.format(resume_json=resume_json_str)]}
-        ])
-        
-        # The summary is expected to be plain text, not JSON
-        summary_text = response.text.strip()
-        
-        # Remove any leading/trailing markdown characters if AI accidentally adds them
-        if summary_text.startswith('```') and summary_text.endswith('```'):
-            summary_text = summary_text[3:-3].strip()
+        response_text = generate_text(SUMMARY_PROMPT.format(resume_json=resume_json_str))
+        return _clean_summary(response_text)
+    except Exception as e:
+        logger.error(f"Error generating resume summary: {str(e)}")
+        return "Could not generate a summary for this resume."
 
-        return summary_text
-        
+async def generate_resume_summary_async(parsed_resume_data: dict) -> str:
+    """Async variant of generate_resume_summary; run it with run_gemini_coroutine()."""
+    try:
+        resume_json_str = json.dumps(parsed_resume_data, indent=2)
+        response_text = await generate_text_async(SUMMARY_PROMPT.format(resume_json=resume_json_str))
+        return _clean_summary(response_text)
     except Exception as e:
         logger.error(f"Error generating resume summary: {str(e)}")
         return "Could not generate a summary for this resume."
 
+def _clean_summary(response_text):
+    # The summary is expected to be plain text, not JSON
+    summary_text = response_text.strip()
+    
+    # Remove any leading/trailing markdown characters if AI accidentally adds them
+    if summary_text.startswith('```') and summary_text.endswith('```'):
+        summary_text = summary_text[3:-3].strip()
+
+    return summary_text
+
 def infer_career_interests(parsed_resume_data: dict) -> List[str]:
     """
     Infers broad career interests or job categories from the parsed resume data
@@ -215,42 +328,59 @@ def infer_career_interests(parsed_resume_data: dict) -> List[str]:
     Returns:
         List[str]: A list of 3-5 general job search keywords/categories.
     """
-    prompt = """
-    Analyze the following structured resume data. Based on the candidate's education, work experience, technical skills, soft skills, and projects, infer 3-5 by key words(e.g., "Software Developer","Python", "Data", "A.I" "Markating", "Data Analysis", "Customer Service", "Education", "Healthcare", "Admin Support"). Return ONLY a valid JSON array of these keywords. Do not include any introductory or concluding text, or markdown code block fences.
+    try:
+        resume_json_str = json.dumps(parsed_resume_data, indent=2)
+        response_text = generate_text(CAREER_INTERESTS_PROMPT.format(resume_json=resume_json_str))
+    except Exception as e:
+        logger.error(f"General error in AI processing for infer_career_interests: {str(e)}")
+        return list(DEFAULT_CAREER_INTERESTS) # Fallback
+    return _parse_career_interests(response_text)
 
-    Resume Data (JSON):
-    {resume_json}
+async def infer_career_interests_async(parsed_resume_data: dict) -> List[str]:
+    """Async variant of infer_career_interests; run it with run_gemini_coroutine()."""
+    try:
+        resume_json_str = json.dumps(parsed_resume_data, indent=2)
+        response_text = await generate_text_async(CAREER_INTERESTS_PROMPT.format(resume_json=resume_json_str))
+    except Exception as e:
+        logger.error(f"General error in AI processing for infer_career_interests: {str(e)}")
+        return list(DEFAULT_CAREER_INTERESTS) # Fallback
+    return _parse_career_interests(response_text)
 
-    Return: []
+async def _summary_and_interests_async(parsed_resume_data, summary, interests):
+    async def skipped():
+        return None
+    return await asyncio.gather(
+        generate_resume_summary_async(parsed_resume_data) if summary else skipped(),
+        infer_career_interests_async(parsed_resume_data) if interests else skipped(),
+    )
+
+def generate_summary_and_interests(parsed_resume_data: dict, summary: bool = True,
+                                   interests: bool = True) -> Tuple[Optional[str], Optional[List[str]]]:
     """
-    
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    
+    Generates the resume summary and infers career interests concurrently (two Gemini
+    calls in flight instead of one after the other). A part that isn't requested is None.
+    """
+    if not (summary or interests):
+        return None, None
+    resume_summary, career_interests = run_gemini_coroutine(
+        _summary_and_interests_async(parsed_resume_data, summary, interests)
+    )
+    return resume_summary, career_interests
+
+def _parse_career_interests(response_text):
+    cleaned_response = clean_json_response(response_text)
     try:
-        resume_json_str = json.dumps(parsed_resume_data, indent=2)
-        
-        response = model.generate_content([
-            {"role": "user", 
-             "parts": [prompt.format(resume_json=resume_json_str)]}
-        ])
-        
-        cleaned_response = clean_json_response(response.text)
         inferred_interests = json.loads(cleaned_response)
-        
-        if isinstance(inferred_interests, list) and all(isinstance(item, str) for item in inferred_interests):
-            logger.info(f"Inferred career interests: {inferred_interests}")
-            return inferred_interests
-        else:
-            logger.warning(f"Unexpected format for inferred career interests: {inferred_interests}. Returning default.")
-            return ["IT", "Administration", "Sales", "Customer Service"] # Fallback generic interests
-        
     except json.JSONDecodeError as je:
         logger.error(f"JSON Decode Error in infer_career_interests: {je}")
         logger.error(f"Problematic JSON string for career interests: {cleaned_response[:500]}...")
-        return ["IT", "Administration", "Sales", "Customer Service"]
-    except Exception as e:
-        logger.error(f"General error in AI processing for infer_career_interests: {str(e)}")
-        return ["IT", "Administration", "Sales", "Customer Service"] # Fallback
+        return list(DEFAULT_CAREER_INTERESTS)
+
+    if isinstance(inferred_interests, list) and all(isinstance(item, str) for item in inferred_interests):
+        logger.info(f"Inferred career interests: {inferred_interests}")
+        return inferred_interests
+    logger.warning(f"Unexpected format for inferred career interests: {inferred_interests}. Returning default.")
+    return list(DEFAULT_CAREER_INTERESTS) # Fallback generic interests
 
 UPLOAD_PATH = "uploads" # Matches app.config['UPLOAD_FOLDER'] in cli4.py
 os.makedirs(UPLOAD_PATH, exist_ok=True)
@@ -1,8 +1,18 @@
 # scraper.py
+import hashlib
 import logging
+import os
+import queue
+import threading
 import time
 import random
-from typing import List, Dict, Optional
+import unicodedata
+import urllib.parse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -11,12 +21,73 @@ from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import re
 from selenium.webdriver.chrome.service import Service
+from resume_scraper.page_archive import PAGE_ARCHIVE_ENABLED, archive_page, get_page_archive
+from resume_scraper.page_readiness import MUTATION_OBSERVER_SCRIPT, NetworkActivity, wait_until_ready
+from resume_scraper.politeness import get_politeness_scheduler
+from resume_scraper.resource_blocking import apply_resource_blocking, record_page_load
+from resume_scraper.webdriver_pool import get_webdriver_pool
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+HTTP_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_HTTP_TIMEOUT", "15"))
+HTTP_POOL_SIZE = int(os.getenv("SCRAPER_HTTP_POOL_SIZE", "10"))
+# A description shorter than this in the initial HTML is treated as a stub and re-fetched in the browser
+MIN_DESCRIPTION_CHARS = int(os.getenv("SCRAPER_MIN_DESCRIPTION_CHARS", "200"))
+DETAIL_FETCH_WORKERS = int(os.getenv("SCRAPER_DETAIL_WORKERS", "4"))
+# Extract card fields / description text inside the page instead of transferring and parsing page_source
+IN_BROWSER_EXTRACTION = os.getenv("SCRAPER_IN_BROWSER_EXTRACTION", "1") != "0"
+# Search result pages walked per query, and the card budget across them (0: no limit)
+SEARCH_MAX_PAGES = int(os.getenv("SCRAPER_SEARCH_MAX_PAGES", "3"))
+SEARCH_MAX_CARDS = int(os.getenv("SCRAPER_SEARCH_MAX_CARDS", "75"))
+SEARCH_PAGE_SIZE = 25  # cards per LinkedIn result page ("start" offset step)
+
+# Where the posting text lives: logged-in layout first, then the public (guest) job page
+DESCRIPTION_SELECTORS = [
+    "div.jobs-description__content.jobs-description-content",
+    "div.description__text",
+    "div.show-more-less-html__markup",
+]
+
+# Returns [{title, company, location, url}] for the job cards on a search results page
+JOB_CARDS_SCRIPT = """
+const text = (card, selector) => {
+    const el = card.querySelector(selector);
+    return el ? el.textContent.trim() : "N/A";
+};
+return Array.from(document.querySelectorAll("div.job-card-container, div.job-search-card")).map(card => {
+    const link = card.querySelector("a.base-card__full-link") || card.querySelector("a.job-card-container__link");
+    return {
+        title: text(card, "h3.base-search-card__title"),
+        company: text(card, "h4.base-search-card__subtitle"),
+        location: text(card, "span.job-search-card__location"),
+        url: link ? link.href.split("?")[0] : null
+    };
+});
+"""
+
+# Returns the innerText of the first description element present (without "Show more" buttons), or null
+DESCRIPTION_SCRIPT = """
+for (const selector of arguments[0]) {
+    const el = document.querySelector(selector);
+    if (!el) continue;
+    const clone = el.cloneNode(true);
+    clone.querySelectorAll(".show-more-less-html__button").forEach(button => button.remove());
+    document.body.appendChild(clone);  // innerText needs a rendered node to keep line breaks
+    const text = clone.innerText;
+    clone.remove();
+    return text.split("\\n").map(line => line.trim()).filter(Boolean).join("\\n");
+}
+return null;
+"""
+
+_http_session = None
+_http_session_lock = threading.Lock()
+_fetch_stats = Counter()
+_fetch_stats_lock = threading.Lock()
+
 
 def create_webdriver() -> webdriver.Chrome:
     """
@@ -53,6 +124,10 @@ def create_webdriver() -> webdriver.Chrome:
         "profile.password_manager_enabled": False
     }
     options.add_experimental_option("prefs", prefs)
+
+    # CDP Network events in the performance log drive network-idle detection (page_readiness)
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
     
     # Add path to chromedriver
     service = Service(executable_path="/Users/ayush/CVisionary-AI Based Resume Screener With Job Matching/chromedriver")
@@ -68,6 +143,8 @@ def create_webdriver() -> webdriver.Chrome:
             })
         """
     })
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": MUTATION_OBSERVER_SCRIPT})
+    apply_resource_blocking(driver)
     
     return driver
 
@@ -84,176 +161,436 @@ def random_user_agent():
     return random.choice(agents)
 
 
-def scroll_to_end_of_linkedin_search_results(driver, max_scrolls=3):
+JOB_CARD_SELECTOR = "div.job-card-container, div.job-search-card"
+
+
+def _scroll_rounds(driver, max_scrolls=3, network: Optional[NetworkActivity] = None) -> Iterator[int]:
     """
-    Scrolls down LinkedIn job search results page to load more jobs.
-    Uses random delays and human-like behavior.
+    Scrolls down a LinkedIn job search results page to load more jobs, yielding the card
+    count after the initial load and after every round that loaded more, so cards can be
+    read while later rounds are still to come.
+    Each round scrolls to the bottom and waits until the page has settled (DOM and network
+    quiet, card count stable); scrolling stops as soon as a round loads no new cards.
     """
-    last_height = driver.execute_script("return document.body.scrollHeight")
+    card_count = wait_until_ready(driver, network, JOB_CARD_SELECTOR)
+    yield card_count
     for i in range(max_scrolls):
-        logger.info(f"Scrolling attempt {i+1}/{max_scrolls}")
-        
-        # Scroll in chunks with random delays
-        current_scroll = 0
-        target_scroll = last_height
-        while current_scroll < target_scroll:
-            scroll_amount = random.randint(100, 300)
-            driver.execute_script(f"window.scrollBy(0, {scroll_amount});")
-            current_scroll += scroll_amount
-            time.sleep(random.uniform(0.1, 0.3))
-            
-        time.sleep(random.uniform(2, 4))
-        
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        new_count = wait_until_ready(driver, network, JOB_CARD_SELECTOR)
+        logger.info(f"Scroll {i+1}/{max_scrolls}: {new_count} job cards loaded")
+        if new_count <= card_count:
             logger.info("Reached end of scrollable content or no new content loaded.")
             break
-        last_height = new_height
-        
-        # Random chance to pause scrolling (simulates human behavior)
-        if random.random() < 0.3:
-            time.sleep(random.uniform(1, 2))
-    
-    # Try to click "See more jobs" button if present
+        card_count = new_count
+        yield card_count
+
+    # Click "See more jobs" if the page offers it
+    new_count = card_count
     try:
-        see_more_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "button[aria-label='See more jobs']"))
-        )
-        if see_more_button:
+        see_more_buttons = [
+            button for button in driver.find_elements(By.CSS_SELECTOR, "button[aria-label='See more jobs']")
+            if button.is_displayed() and button.is_enabled()
+        ]
+        if see_more_buttons:
             actions = webdriver.ActionChains(driver)
-            actions.move_to_element(see_more_button)
-            actions.pause(random.uniform(0.5, 1))
+            actions.move_to_element(see_more_buttons[0])
             actions.click()
             actions.perform()
-            time.sleep(random.uniform(2, 4))
-            logger.info("Clicked 'See more jobs' button.")
+            new_count = wait_until_ready(driver, network, JOB_CARD_SELECTOR)
+            logger.info(f"Clicked 'See more jobs' button: {new_count} job cards loaded.")
     except Exception:
         logger.debug("No 'See more jobs' button found or clickable.")
+    if new_count > card_count:
+        yield new_count
+
+
+def scroll_to_end_of_linkedin_search_results(driver, max_scrolls=3, network: Optional[NetworkActivity] = None):
+    """Scrolls down LinkedIn job search results page to load more jobs."""
+    for _ in _scroll_rounds(driver, max_scrolls, network):
+        pass
+
+
+def _is_job_view_url(url: Optional[str]) -> bool:
+    return bool(url) and url.startswith("https://www.linkedin.com/jobs/view/")
+
+
+def _job_cards_in_browser(driver) -> Optional[List[Dict]]:
+    """Job card fields extracted inside the page; None if the script failed (caller falls back to page_source)."""
+    try:
+        cards = driver.execute_script(JOB_CARDS_SCRIPT) or []
+    except Exception as e:
+        logger.warning(f"In-browser job card extraction failed, parsing page source instead: {e}")
+        return None
+    return [card for card in cards if isinstance(card, dict) and _is_job_view_url(card.get("url"))]
+
+
+def _parse_job_cards(page_source: str) -> List[Dict]:
+    """Job card fields parsed from a search results page's HTML."""
+    job_cards_data = []
+    soup = BeautifulSoup(page_source, "html.parser")
+    for card in soup.find_all("div", class_=re.compile(r"job-card-container|job-search-card")):
+        try:
+            title_elem = card.find("h3", class_="base-search-card__title")
+            company_elem = card.find("h4", class_="base-search-card__subtitle")
+            location_elem = card.find("span", class_="job-search-card__location")
+            
+            job_link_elem = card.find("a", class_="base-card__full-link") 
+            if not job_link_elem:
+                job_link_elem = card.find("a", class_="job-card-container__link")
+
+            job_url = job_link_elem['href'].split('?')[0] if job_link_elem else None
+
+            if _is_job_view_url(job_url):
+                job_cards_data.append({
+                    "title": title_elem.get_text(strip=True) if title_elem else "N/A",
+                    "company": company_elem.get_text(strip=True) if company_elem else "N/A",
+                    "location": location_elem.get_text(strip=True) if location_elem else "N/A",
+                    "url": job_url
+                })
+        except Exception as e:
+            logger.warning(f"Error parsing a job card: {e}")
+            continue
+    return job_cards_data
+
+
+def _current_job_cards(driver) -> List[Dict]:
+    # Only the card fields cross the WebDriver protocol; page_source is the fallback
+    job_cards_data = _job_cards_in_browser(driver) if IN_BROWSER_EXTRACTION else None
+    if job_cards_data is None:
+        job_cards_data = _parse_job_cards(driver.page_source)
+    return job_cards_data
+
+
+def _search_page_url(search_url: str, page: int) -> str:
+    """URL of the page-th (0-based) result page of a search, via LinkedIn's "start" offset."""
+    if page == 0:
+        return search_url
+    parts = urllib.parse.urlsplit(search_url)
+    query = dict(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+    query["start"] = str(page * SEARCH_PAGE_SIZE)
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+
+def iter_job_cards(search_url: str, max_pages: int = SEARCH_MAX_PAGES, max_cards: int = SEARCH_MAX_CARDS) -> Iterator[Dict]:
+    """
+    Walks the result pages of a LinkedIn job search and yields each job card (title, company,
+    location, url) as soon as it has been read, so callers can start fetching details while
+    later scroll rounds and result pages are still loading.
+    Stops after max_pages result pages, after max_cards cards (0: no limit) or at the first
+    page that adds no new cards. Errors end the walk early instead of raising.
+    """
+    seen = set()
+    try:
+        with get_webdriver_pool().driver() as driver:
+            for page in range(max_pages):
+                page_url = _search_page_url(search_url, page)
+                logger.info(f"Loading LinkedIn search page {page + 1}/{max_pages}: {page_url}")
+
+                network = NetworkActivity(driver)
+                # Pacing between page loads is owned by the politeness scheduler
+                with get_politeness_scheduler().slot(page_url):
+                    load_started = time.time()
+                    driver.get(page_url)
+
+                # Wait for the job cards to load with increased timeout
+                try:
+                    WebDriverWait(driver, 30).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "div.job-card-container"))
+                    )
+                except Exception as e:
+                    if page == 0:
+                        logger.warning(f"Timeout waiting for job cards: {e}")
+                        get_politeness_scheduler().record_error(search_url)
+                    else:
+                        logger.info(f"No more result pages after page {page} of {search_url}")
+                    return
+
+                # Cards are yielded after every scroll round, not once the page is exhausted
+                page_cards = 0
+                budget_reached = False
+                for _ in _scroll_rounds(driver, network=network):
+                    for card in _current_job_cards(driver):
+                        if card["url"] in seen:
+                            continue
+                        seen.add(card["url"])
+                        page_cards += 1
+                        yield card
+                        if max_cards and len(seen) >= max_cards:
+                            budget_reached = True
+                            break
+                    if budget_reached:
+                        break
+                record_page_load(page_url, time.time() - load_started, network)
+
+                if not page_cards:
+                    if page == 0:
+                        logger.warning(f"No job cards found on {search_url}")
+                        get_politeness_scheduler().record_error(search_url)
+                    break
+                logger.info(f"Read {page_cards} job cards from result page {page + 1} ({len(seen)} in total)")
+                get_politeness_scheduler().record_success(page_url)
+                if budget_reached:
+                    logger.info(f"Reached the budget of {max_cards} job cards for {search_url}")
+                    break
+
+    except Exception as e:
+        logger.error(f"Error scraping LinkedIn search page {search_url}: {e}")
+        get_politeness_scheduler().record_error(search_url)
 
 
 def scrape_job_links_from_search_page(search_url: str) -> List[Dict]:
     """
     Scrapes job titles, companies, locations, and direct job URLs from a LinkedIn job search page.
     """
-    driver = None
-    job_cards_data = []
+    job_cards_data = list(iter_job_cards(search_url, max_pages=1, max_cards=0))
+    if job_cards_data:
+        logger.info(f"Successfully scraped {len(job_cards_data)} job links.")
+    return job_cards_data
+
+
+def _count(event: str):
+    with _fetch_stats_lock:
+        _fetch_stats[event] += 1
+
+
+def fetch_stats() -> Dict:
+    """Detail fetches served by each tier, plus how often the HTTP tier had to escalate."""
+    with _fetch_stats_lock:
+        stats = dict(_fetch_stats)
+    total = stats.get("http_hits", 0) + stats.get("browser_hits", 0)
+    stats["http_hit_rate"] = round(stats.get("http_hits", 0) / total, 4) if total else 0.0
+    return stats
+
+
+def get_http_session() -> requests.Session:
+    """Shared keep-alive HTTP session (connection pooling across detail fetches and threads)."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "User-Agent": random_user_agent(),
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+            })
+            _http_session = session
+        return _http_session
+
+
+def _extract_description(soup: BeautifulSoup) -> Optional[str]:
+    """Text of the job description element, without the "Show more" buttons; None if absent."""
+    for selector in DESCRIPTION_SELECTORS:
+        description_div = soup.select_one(selector)
+        if description_div:
+            for button in description_div.find_all(["span", "button"], class_=re.compile(r"show-more-less-html__button")):
+                button.decompose()
+            return description_div.get_text(separator="\n", strip=True)
+    return None
+
+
+def description_hash(description: str) -> str:
+    """
+    sha256 of a description with case, Unicode forms and whitespace normalized, so the same
+    posting hashes the same whichever tier fetched it and however its markup wrapped lines.
+    """
+    normalized = " ".join(unicodedata.normalize("NFKC", description).casefold().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _stored_validators(job_url: str) -> Optional[Dict]:
+    if not PAGE_ARCHIVE_ENABLED:
+        return None
+    try:
+        return get_page_archive().validators(job_url)
+    except Exception as e:
+        logger.debug(f"No conditional fetch for {job_url}, page archive unavailable: {e}")
+        return None
+
+
+def fetch_description_http(job_url: str) -> Optional[str]:
+    """
+    Fetches a job page with a plain HTTP GET. Returns the description only if the initial
+    HTML already contains it; None means the page needs a browser.
+    When an earlier fetch returned an ETag or Last-Modified the request is conditional, and
+    a 304 answer returns the archived description without downloading the page again.
+    """
+    validators = _stored_validators(job_url)
+    headers = {}
+    if validators:
+        if validators["etag"]:
+            headers["If-None-Match"] = validators["etag"]
+        if validators["last_modified"]:
+            headers["If-Modified-Since"] = validators["last_modified"]
     try:
-        driver = create_webdriver()
-        logger.info(f"Loading LinkedIn search page: {search_url}")
-        
-        # Add random delays and mouse movements to appear more human-like
-        driver.get(search_url)
-        time.sleep(random.uniform(3, 5))
-        
-        # Wait for the job cards to load with increased timeout
+        with get_politeness_scheduler().slot(job_url):
+            response = get_http_session().get(job_url, headers=headers, timeout=HTTP_TIMEOUT_SECONDS)
+    except requests.RequestException as e:
+        logger.info(f"HTTP fetch failed for {job_url}: {e}")
+        _count("http_errors")
+        get_politeness_scheduler().record_error(job_url)
+        return None
+    if response.status_code == 304 and validators:
+        get_politeness_scheduler().record_success(job_url)
         try:
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.job-card-container"))
-            )
+            description = get_page_archive().get_text(validators["text_hash"])
         except Exception as e:
-            logger.warning(f"Timeout waiting for job cards: {e}")
-            return []
-            
-        time.sleep(random.uniform(2, 4))
-
-        # Scroll with random pauses
-        scroll_to_end_of_linkedin_search_results(driver)
-        
-        # Add random mouse movements
-        actions = webdriver.ActionChains(driver)
-        elements = driver.find_elements(By.CSS_SELECTOR, "div.job-card-container")
-        for element in elements[:min(3, len(elements))]:  # Move to first few elements
-            actions.move_to_element(element)
-            actions.pause(random.uniform(0.5, 1.5))
-        actions.perform()
-        
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        job_cards = soup.find_all("div", class_=re.compile(r"job-card-container|job-search-card"))
-        
-        if not job_cards:
-            logger.warning(f"No job cards found on {search_url}")
-            return []
-
-        for card in job_cards:
-            try:
-                title_elem = card.find("h3", class_="base-search-card__title")
-                company_elem = card.find("h4", class_="base-search-card__subtitle")
-                location_elem = card.find("span", class_="job-search-card__location")
-                
-                job_link_elem = card.find("a", class_="base-card__full-link") 
-                if not job_link_elem:
-                    job_link_elem = card.find("a", class_="job-card-container__link")
-
-                job_url = job_link_elem['href'].split('?')[0] if job_link_elem else None
-
-                if job_url and job_url.startswith("https://www.linkedin.com/jobs/view/"):
-                    card_data = {
-                        "title": title_elem.get_text(strip=True) if title_elem else "N/A",
-                        "company": company_elem.get_text(strip=True) if company_elem else "N/A",
-                        "location": location_elem.get_text(strip=True) if location_elem else "N/A",
-                        "url": job_url
-                    }
-                    job_cards_data.append(card_data)
-                    
-                    # Add random delay between processing cards
-                    time.sleep(random.uniform(0.2, 0.5))
-            except Exception as e:
-                logger.warning(f"Error parsing a job card: {e}")
-                continue
+            logger.warning(f"Could not read archived description for {job_url}: {e}")
+            description = None
+        if description:
+            _count("http_not_modified")
+            return description
+        _count("http_errors")  # archived text is gone; the browser tier fetches the page in full
+        return None
+    if response.status_code != 200:
+        logger.info(f"HTTP fetch of {job_url} returned {response.status_code}")
+        if response.status_code in (403, 429, 999):
+            # Rate limited / bot wall: slow down for the whole host, not just this request
+            _count("http_blocked")
+            get_politeness_scheduler().record_error(job_url)
+        else:
+            _count("http_errors")
+        return None
+    get_politeness_scheduler().record_success(job_url)
+
+    description = _extract_description(BeautifulSoup(response.text, "html.parser"))
+    if not description or len(description) < MIN_DESCRIPTION_CHARS:
+        _count("http_incomplete")
+        return None
+    archive_page(job_url, description, response.text, "http", validators={
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    })
+    return description
 
-        logger.info(f"Successfully scraped {len(job_cards_data)} job links.")
-        return job_cards_data
 
+def _description_in_browser(driver) -> Optional[str]:
+    """Description innerText read inside the page; None if absent or the script failed."""
+    try:
+        return driver.execute_script(DESCRIPTION_SCRIPT, DESCRIPTION_SELECTORS) or None
     except Exception as e:
-        logger.error(f"Error scraping LinkedIn search page {search_url}: {e}")
-        return []
-    finally:
-        if driver:
-            driver.quit()
+        logger.warning(f"In-browser description extraction failed, parsing page source instead: {e}")
+        return None
 
 
-def scrape_detailed_job_description(job_url: str) -> Optional[str]:
-    """
-    Scrapes the full job description text from an individual LinkedIn job posting page.
-    """
-    driver = None
+def fetch_description_browser(job_url: str) -> Optional[str]:
+    """Renders the job page in a pooled browser and extracts the description."""
     try:
-        driver = create_webdriver()
-        logger.info(f"Loading detailed job page: {job_url}")
-        driver.get(job_url)
-
-        # Wait for the main job description content to be present
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.description__text"))
-        )
-        time.sleep(random.uniform(2, 4)) # Allow content to fully render
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        
-        # Find the main job description element
-        description_div = soup.find("div", class_="jobs-description__content jobs-description-content")
-        
-        if description_div:
-            # Extract text, remove any "Show more" buttons if present
-            for span in description_div.find_all("span", class_="show-more-less-html__button"):
-                span.decompose() # Remove the button from the soup
-            
-            full_description = description_div.get_text(separator="\n", strip=True)
-            logger.info(f"Successfully scraped detailed description (length: {len(full_description)} chars) for {job_url}")
+        with get_webdriver_pool().driver() as driver:
+            logger.info(f"Loading detailed job page: {job_url}")
+            network = NetworkActivity(driver)
+            with get_politeness_scheduler().slot(job_url):
+                load_started = time.time()
+                driver.get(job_url)
+
+            # Wait for the main job description content to be present
+            WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.description__text"))
+            )
+            record_page_load(job_url, time.time() - load_started, network)
+
+            full_description = _description_in_browser(driver) if IN_BROWSER_EXTRACTION else None
+            # The archive keeps the rendered HTML even when the text was extracted in the page
+            page_source = driver.page_source if PAGE_ARCHIVE_ENABLED or not full_description else None
+        get_politeness_scheduler().record_success(job_url)
+        if full_description:
+            archive_page(job_url, full_description, page_source, "browser")
             return full_description
-        else:
+
+        soup = BeautifulSoup(page_source, "html.parser")
+        full_description = _extract_description(soup)
+        if not full_description:
             logger.warning(f"Could not find job description div for {job_url}")
             # Try to get the whole body text as a fallback if description div not found
             body = soup.body
-            if body:
-                return body.get_text(separator="\n", strip=True)
-            return None # No useful content found
+            full_description = body.get_text(separator="\n", strip=True) if body else None
+        if full_description:
+            archive_page(job_url, full_description, page_source, "browser")
+        return full_description # None: no useful content found
     except Exception as e:
         logger.error(f"Error scraping detailed job description from {job_url}: {e}")
+        get_politeness_scheduler().record_error(job_url)
         return None
-    finally:
-        if driver:
-            driver.quit()
+
+
+def scrape_detailed_job_description(job_url: str) -> Optional[str]:
+    """
+    Scrapes the full job description text from an individual LinkedIn job posting page.
+    Public postings usually carry the description in the initial HTML, so a plain HTTP
+    fetch is tried first; the page is rendered in a browser only when that comes up empty.
+    """
+    description = fetch_description_http(job_url)
+    if description:
+        _count("http_hits")
+        logger.info(f"Fetched detailed description over HTTP (length: {len(description)} chars) for {job_url}")
+        return description
+
+    description = fetch_description_browser(job_url)
+    _count("browser_hits" if description else "browser_failures")
+    if description:
+        logger.info(f"Successfully scraped detailed description (length: {len(description)} chars) for {job_url}")
+    return description
+
+
+def fetch_job_descriptions(job_urls: Iterable[str], max_workers: int = DETAIL_FETCH_WORKERS) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Fetches several job descriptions concurrently and yields (url, description) as each one
+    completes, so callers can process early results while the rest are still downloading.
+    job_urls may be a lazy iterable (e.g. over iter_job_cards): it is consumed on a separate
+    thread and each URL is fetched as soon as it arrives, while the caller handles results.
+    Request rates stay within the per-host politeness limits.
+    """
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def submit_all(executor: ThreadPoolExecutor):
+        submitted = 0
+        seen = set()
+        url_iterator = iter(job_urls)
+        try:
+            for url in url_iterator:
+                if stop.is_set():
+                    break
+                if url in seen:
+                    continue
+                seen.add(url)
+                try:
+                    future = executor.submit(scrape_detailed_job_description, url)
+                except RuntimeError:
+                    break  # executor shut down: the caller stopped consuming results
+                future.add_done_callback(lambda f, url=url: results.put((url, f)))
+                submitted += 1
+        except Exception as e:
+            logger.error(f"Error while listing jobs to fetch: {e}")
+        finally:
+            if stop.is_set() and hasattr(url_iterator, "close"):
+                url_iterator.close()  # e.g. lets iter_job_cards hand its browser back to the pool
+            results.put((None, submitted))  # end marker: total number of fetches to wait for
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="detail-fetch") as executor:
+        producer = threading.Thread(target=submit_all, args=(executor,), name="detail-fetch-producer", daemon=True)
+        producer.start()
+        expected, received = None, 0
+        try:
+            while expected is None or received < expected:
+                url, item = results.get()
+                if url is None:
+                    expected = item
+                    continue
+                received += 1
+                try:
+                    yield url, item.result()
+                except Exception as e:
+                    logger.error(f"Error fetching job description from {url}: {e}")
+                    yield url, None
+        finally:
+            # The caller stopped early: submit nothing more and drop fetches not yet started
+            stop.set()
+            if expected is None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            producer.join()
 
 
 def clean_body_content(html: str) -> str:
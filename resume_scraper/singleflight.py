@@ -0,0 +1,96 @@
+# singleflight.py
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key within this process: the first caller
+    (the leader) runs the work, the others wait for it and share its result or exception.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], str]) -> str:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[str]]) -> str:
+        """Async variant of do; coalesces callers running on the same event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._futures.get(key)
+            is_leader = future is None or future.get_loop() is not loop
+            if is_leader:
+                future = self._futures[key] = loop.create_future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            return await asyncio.shield(future)
+
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                future.exception()  # mark retrieved: there may be no followers
+            else:
+                future.cancel()
+            raise
+        finally:
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls) + len(self._futures)}
+
+
+_singleflight = SingleFlight()
+
+
+def get_singleflight() -> SingleFlight:
+    return _singleflight
@@ -0,0 +1,253 @@
+# skills.py
+import json
+import logging
+import os
+import re
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Optional JSON file ({"canonical skill": ["alias", ...]}) merged into SKILL_ALIASES
+SKILL_ONTOLOGY_PATH = os.getenv("SKILL_ONTOLOGY_PATH")
+
+# Canonical skill name -> aliases. Matching is done on canonical names, so "JS",
+# "Javascript" and "java script" on either side all count as the same skill.
+SKILL_ALIASES: Dict[str, List[str]] = {
+    "javascript": ["js", "java script", "ecmascript", "es6"],
+    "typescript": ["ts"],
+    "python": ["python3", "python 3", "py"],
+    "java": ["core java", "java se"],
+    "c#": ["csharp", "c sharp"],
+    "c++": ["cpp", "c plus plus"],
+    "golang": ["go lang", "go"],
+    "node.js": ["node", "nodejs", "node js"],
+    "react": ["react.js", "reactjs", "react js"],
+    "angular": ["angularjs", "angular.js"],
+    "vue.js": ["vue", "vuejs"],
+    "next.js": ["nextjs"],
+    "django": ["django rest framework", "drf"],
+    "flask": [],
+    "html": ["html5"],
+    "css": ["css3"],
+    "sql": ["structured query language"],
+    "postgresql": ["postgres", "psql"],
+    "mysql": [],
+    "mongodb": ["mongo"],
+    "amazon web services": ["aws"],
+    "google cloud platform": ["gcp", "google cloud"],
+    "microsoft azure": ["azure"],
+    "docker": [],
+    "kubernetes": ["k8s"],
+    "git": ["github", "gitlab"],
+    "ci/cd": ["cicd", "ci cd", "continuous integration"],
+    "rest api": ["rest", "restful", "restful api", "rest apis"],
+    "machine learning": ["ml"],
+    "deep learning": ["dl"],
+    "artificial intelligence": ["ai", "a.i"],
+    "natural language processing": ["nlp"],
+    "data analysis": ["data analytics", "analytics"],
+    "power bi": ["powerbi"],
+    "microsoft excel": ["excel", "ms excel", "advanced excel"],
+    "microsoft office": ["ms office", "office 365"],
+    "agile": ["agile methodology", "agile methodologies"],
+    "scrum": [],
+    "jira": [],
+    "communication": ["communication skills", "verbal communication", "written communication"],
+    "teamwork": ["team work", "team player", "collaboration"],
+    "problem solving": ["problem-solving", "problem solving skills"],
+    "leadership": ["team leadership"],
+    "customer service": ["customer support", "client service"],
+    "project management": ["project manager", "pmp"],
+    "seo": ["search engine optimization"],
+    "digital marketing": ["online marketing"],
+}
+
+# Aliases that are common English words or fragments; fine in a skills list, but too
+# noisy to match in free description text ("go to market", "rest assured", "excel at")
+AMBIGUOUS_IN_TEXT = {"go", "rest", "ts", "py", "dl", "node", "excel", "analytics", "collaboration", "ai"}
+
+# Skills most postings mention whatever the role; they say nothing about its domain
+GENERIC_SKILLS = {"communication", "teamwork", "problem solving", "leadership"}
+# Role-specific ontology hits needed before job extraction stops asking the LLM for skills
+ONTOLOGY_MIN_SKILLS = int(os.getenv("SKILL_ONTOLOGY_MIN_SKILLS", "3"))
+
+# Share of match_score that comes from the skill overlap (experience and requirement fit: 30% each)
+SKILL_OVERLAP_WEIGHT = 0.4
+
+if SKILL_ONTOLOGY_PATH:
+    try:
+        with open(SKILL_ONTOLOGY_PATH, encoding="utf-8") as f:
+            for _canonical, _aliases in json.load(f).items():
+                SKILL_ALIASES.setdefault(_canonical.lower(), []).extend(a.lower() for a in _aliases)
+    except (OSError, ValueError, AttributeError) as e:
+        logger.error(f"Could not load skill ontology from {SKILL_ONTOLOGY_PATH}: {e}")
+
+_ALIAS_TO_CANONICAL = {}
+for _canonical, _aliases in SKILL_ALIASES.items():
+    _ALIAS_TO_CANONICAL[_canonical] = _canonical
+    for _alias in _aliases:
+        _ALIAS_TO_CANONICAL[_alias] = _canonical
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = re.compile(r"^[^\w#+.]+|[^\w#+]+$")
+
+
+def normalize_skill(skill: str) -> str:
+    """Lower-cases, trims punctuation/whitespace and maps aliases to their canonical skill name."""
+    text = _WHITESPACE.sub(" ", str(skill).lower()).strip()
+    text = _EDGE_PUNCTUATION.sub("", text)
+    return _ALIAS_TO_CANONICAL.get(text, text)
+
+
+def normalize_skills(skills: Iterable[str]) -> Set[str]:
+    return {s for s in (normalize_skill(skill) for skill in skills if skill) if s}
+
+
+def resume_skills(resume_data: Dict, extra_keywords: Iterable[str] = ()) -> Set[str]:
+    """Canonical skills on a parsed resume: skills, certifications, project technologies and keywords."""
+    skills = list(resume_data.get("Technical Skills") or []) + list(resume_data.get("Soft Skills") or [])
+    skills += list(resume_data.get("Certifications") or [])
+    for project in resume_data.get("Projects") or []:
+        if isinstance(project, dict):
+            skills += list(project.get("Technologies") or [])
+    skills += [k for k in extra_keywords if isinstance(k, str)]
+    return normalize_skills(skills)
+
+
+def merge_skills(*skill_lists: Iterable[str]) -> List[str]:
+    """Canonical skills from several sources (ontology hits, LLM output), deduplicated in first-seen order."""
+    merged = []
+    for skills in skill_lists:
+        for skill in skills or []:
+            canonical = normalize_skill(skill) if isinstance(skill, str) else ""
+            if canonical and canonical not in merged:
+                merged.append(canonical)
+    return merged
+
+
+def ontology_coverage_sufficient(skills: Iterable[str]) -> bool:
+    """
+    Whether the ontology found enough role-specific skills in a description to skip LLM
+    skill extraction. The built-in ontology is mostly technical, so for other roles
+    (teaching, sales, HR) it typically only finds generic skills and the LLM is still asked.
+    """
+    return sum(1 for skill in skills if skill not in GENERIC_SKILLS) >= ONTOLOGY_MIN_SKILLS
+
+
+def skill_overlap(candidate_skills: Set[str], job_skills: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """
+    Splits a job's required skills into (matched, missing) against a set of canonical
+    candidate skills. The job's own spelling of each skill is kept for display.
+    """
+    matched, missing, seen = [], [], set()
+    for skill in job_skills or []:
+        canonical = normalize_skill(skill)
+        if not canonical or canonical in seen:
+            continue
+        seen.add(canonical)
+        (matched if canonical in candidate_skills else missing).append(str(skill).strip())
+    return matched, missing
+
+
+def combine_match_score(matched_count: int, job_skill_count: int, experience_alignment: int, requirement_fit: int) -> int:
+    """
+    Combines the locally computed skill overlap with the LLM's 0-100 experience and
+    requirement judgements into the final 0-100 match_score (40/30/30).
+    Jobs without listed skills are scored on experience and requirements alone.
+    """
+    judged = (experience_alignment + requirement_fit) / 2
+    if not job_skill_count:
+        return max(0, min(100, round(judged)))
+    skill_score = 100 * matched_count / job_skill_count
+    return max(0, min(100, round(SKILL_OVERLAP_WEIGHT * skill_score + (1 - SKILL_OVERLAP_WEIGHT) * judged)))
+
+
+class SkillAutomaton:
+    """
+    Aho-Corasick automaton over every skill name and alias.
+    extract() finds all of them in a text in one pass over its characters, independent of
+    the size of the ontology, and returns canonical skill names.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        # Node i: goto transitions, failure link, and the (pattern length, canonical) outputs ending here
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        for pattern, canonical in patterns.items():
+            self._add(pattern, canonical)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, canonical: str):
+        node = 0
+        for char in pattern:
+            if char not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][char] = len(self._goto) - 1
+            node = self._goto[node][char]
+        self._out[node].append((len(pattern), canonical))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _matches(self, text: str) -> List[Tuple[int, int, str]]:
+        """All (start, end, canonical) occurrences that sit on word boundaries."""
+        found = []
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, canonical in self._out[node]:
+                start = i - length + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (i + 1 == len(text) or not text[i + 1].isalnum()):
+                    found.append((start, i + 1, canonical))
+        return found
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical skills mentioned in text, in order of first mention."""
+        text = _WHITESPACE.sub(" ", (text or "").lower())
+        skills, seen, covered_until = [], set(), 0
+        # Leftmost-longest: "java script" is javascript, not java; "microsoft excel" is one skill
+        for start, end, canonical in sorted(self._matches(text), key=lambda m: (m[0], -m[1])):
+            if start < covered_until:
+                continue
+            covered_until = end
+            if canonical not in seen:
+                seen.add(canonical)
+                skills.append(canonical)
+        return skills
+
+
+_automaton = None
+_automaton_lock = threading.Lock()
+
+
+def get_skill_automaton() -> SkillAutomaton:
+    """Returns the automaton compiled from SKILL_ALIASES (built once per process)."""
+    global _automaton
+    with _automaton_lock:
+        if _automaton is None:
+            patterns = {alias: canonical for alias, canonical in _ALIAS_TO_CANONICAL.items()
+                        if alias not in AMBIGUOUS_IN_TEXT}
+            _automaton = SkillAutomaton(patterns)
+            logger.info(f"Compiled skill automaton: {len(patterns)} patterns, {len(_automaton._goto)} states")
+        return _automaton
+
+
+def extract_skills(text: str) -> List[str]:
+    """Canonical skills mentioned in a raw job description."""
+    return get_skill_automaton().extract(text)
@@ -0,0 +1,206 @@
+# webdriver_pool.py
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+BROWSER_POOL_SIZE = int(os.getenv("SCRAPER_BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_PAGES = int(os.getenv("SCRAPER_BROWSER_MAX_PAGES", "50"))  # recycle after this many checkouts
+BROWSER_MAX_MEMORY_MB = float(os.getenv("SCRAPER_BROWSER_MAX_MEMORY_MB", "512"))  # JS heap of the last page
+BROWSER_CHECKOUT_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_BROWSER_CHECKOUT_TIMEOUT", "300"))
+
+
+class _PooledDriver:
+    __slots__ = ("driver", "pages", "created_at")
+
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+
+class WebDriverPool:
+    """
+    A fixed number of long-lived headless browsers shared by the scraping functions.
+    A browser is checked out for one task, has its cookies and storage cleared when it
+    comes back, and is replaced after BROWSER_MAX_PAGES tasks, when its page memory grows
+    past BROWSER_MAX_MEMORY_MB, when a health check fails or when a task broke its session.
+    """
+
+    def __init__(self, factory: Callable[[], webdriver.Chrome], size: int = BROWSER_POOL_SIZE,
+                 max_pages: int = BROWSER_MAX_PAGES, max_memory_mb: float = BROWSER_MAX_MEMORY_MB):
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self._idle: List[_PooledDriver] = []
+        self._total = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = Counter()
+        self._wait_seconds = 0.0
+        self._startup_seconds = 0.0
+
+    def _create(self) -> _PooledDriver:
+        start = time.time()
+        driver = self.factory()
+        elapsed = time.time() - start
+        try:
+            driver.execute_cdp_cmd("Performance.enable", {})  # for the memory check in _checkin
+        except Exception as e:
+            logger.debug(f"Could not enable performance metrics: {e}")
+        with self._cond:
+            self._stats["created"] += 1
+            self._startup_seconds += elapsed
+        logger.info(f"Started pooled browser in {elapsed:.1f}s")
+        return _PooledDriver(driver)
+
+    def _quit(self, pooled: _PooledDriver, reason: str):
+        with self._cond:
+            self._stats[f"recycled_{reason}"] += 1
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.debug(f"Error quitting browser: {e}")
+        logger.info(f"Recycled pooled browser after {pooled.pages} pages ({reason})")
+
+    def _healthy(self, pooled: _PooledDriver) -> bool:
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _memory_mb(self, pooled: _PooledDriver) -> float:
+        try:
+            metrics = pooled.driver.execute_cdp_cmd("Performance.getMetrics", {}).get("metrics", [])
+            heap = next((m["value"] for m in metrics if m.get("name") == "JSHeapTotalSize"), 0)
+            return heap / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    def _reset(self, pooled: _PooledDriver) -> bool:
+        """Clears per-task browser state so the next task starts like a fresh session."""
+        try:
+            pooled.driver.delete_all_cookies()
+            pooled.driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+            pooled.driver.get("about:blank")
+        except Exception as e:
+            logger.warning(f"Could not reset pooled browser: {e}")
+            return False
+        try:
+            pooled.driver.get_log("performance")  # drop this task's network events
+        except Exception:
+            pass  # performance logging not enabled for this driver
+        return True
+
+    def _checkout(self) -> _PooledDriver:
+        start = time.time()
+        with self._cond:
+            while not self._idle and self._total >= self.size:
+                if self._closed:
+                    raise RuntimeError("WebDriver pool is closed")
+                remaining = BROWSER_CHECKOUT_TIMEOUT_SECONDS - (time.time() - start)
+                if remaining <= 0:
+                    raise TimeoutError(f"No pooled browser became free within {BROWSER_CHECKOUT_TIMEOUT_SECONDS:.0f}s")
+                self._cond.wait(remaining)
+            self._wait_seconds += time.time() - start
+            self._stats["checkouts"] += 1
+            pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                self._total += 1  # reserve the slot before starting Chrome outside the lock
+
+        if pooled is not None:
+            if self._healthy(pooled):
+                return pooled
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            self._quit(pooled, "unhealthy")
+        try:
+            return self._create()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+    def _checkin(self, pooled: _PooledDriver, broken: bool):
+        pooled.pages += 1
+        reason = None
+        if broken:
+            reason = "error"
+        elif pooled.pages >= self.max_pages:
+            reason = "max_pages"
+        elif self.max_memory_mb and self._memory_mb(pooled) > self.max_memory_mb:
+            reason = "memory"
+        elif not self._reset(pooled):
+            reason = "reset_failed"
+
+        if reason or self._closed:
+            self._quit(pooled, reason or "closed")
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self):
+        """Checks out a browser for one task (one or more page loads on the same site)."""
+        pooled = self._checkout()
+        broken = False
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            # The session may be in any state (crashed tab, dead chromedriver): don't reuse it
+            broken = True
+            raise
+        finally:
+            self._checkin(pooled, broken)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._quit(pooled, "closed")
+
+    def stats(self) -> Dict:
+        with self._cond:
+            created = self._stats["created"]
+            return {
+                **self._stats,
+                "size": self.size,
+                "browsers": self._total,
+                "idle": len(self._idle),
+                "in_use": self._total - len(self._idle),
+                "checkout_wait_seconds": round(self._wait_seconds, 3),
+                "avg_startup_seconds": round(self._startup_seconds / created, 3) if created else 0.0,
+            }
+
+
+_pool: Optional[WebDriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_webdriver_pool() -> WebDriverPool:
+    """Returns the process-wide browser pool; browsers are started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from resume_scraper.scraper import create_webdriver  # scraper imports this module
+            _pool = WebDriverPool(create_webdriver)
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,82 @@
+# skill_benchmark.py
+# Benchmarks the Aho-Corasick skill extractor against a naive one-regex-per-alias scan
+# over the job descriptions stored in jobs.db.
+#
+# Usage: python skill_benchmark.py [path/to/jobs.db] [repeat]
+
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from resume_scraper.skills import AMBIGUOUS_IN_TEXT, _ALIAS_TO_CANONICAL, get_skill_automaton
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "jobs.db")
+
+
+def load_descriptions(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT job_description FROM job_listing WHERE job_description IS NOT NULL AND job_description != ''"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+
+def build_regex_baseline():
+    patterns = [
+        (re.compile(r"(?<![a-z0-9])" + re.escape(alias) + r"(?![a-z0-9])"), canonical)
+        for alias, canonical in _ALIAS_TO_CANONICAL.items()
+        if alias not in AMBIGUOUS_IN_TEXT
+    ]
+
+    def extract(text):
+        text = re.sub(r"\s+", " ", text.lower())
+        return {canonical for pattern, canonical in patterns if pattern.search(text)}
+
+    return extract
+
+
+def timed(extract, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [extract(text) for text in corpus]
+    return time.perf_counter() - start, results
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    corpus = load_descriptions(db_path)
+    if not corpus:
+        print(f"No stored job descriptions in {db_path}; run job_scraper.py first.")
+        return
+    total_chars = sum(len(text) for text in corpus)
+
+    automaton = get_skill_automaton()
+    baseline = build_regex_baseline()
+
+    ac_seconds, ac_results = timed(automaton.extract, corpus, repeat)
+    re_seconds, re_results = timed(baseline, corpus, repeat)
+
+    # The automaton resolves overlaps leftmost-longest ("java script" is not also "java"),
+    # so it may report fewer skills than the regex scan; count the documents where they differ
+    differing = sum(1 for a, b in zip(ac_results, re_results) if set(a) != b)
+    skills_per_doc = sum(len(r) for r in ac_results) / len(corpus)
+
+    print(f"Corpus: {len(corpus)} descriptions, {total_chars / 1e6:.2f}M characters, x{repeat}")
+    print(f"Patterns: {sum(1 for alias in _ALIAS_TO_CANONICAL if alias not in AMBIGUOUS_IN_TEXT)}")
+    for name, seconds in (("aho-corasick", ac_seconds), ("regex-per-alias", re_seconds)):
+        per_doc_ms = 1000 * seconds / (len(corpus) * repeat)
+        mb_per_s = total_chars * repeat / seconds / 1e6
+        print(f"{name:>16}: {seconds:.3f}s total, {per_doc_ms:.3f} ms/description, {mb_per_s:.2f} MB/s")
+    print(f"Speedup: {re_seconds / ac_seconds:.1f}x")
+    print(f"Skills per description: {skills_per_doc:.1f}; descriptions where results differ: {differing}")
+
+
+if __name__ == "__main__":
+    main()
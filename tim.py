@@ -12,9 +12,11 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
 
-from langchain_ollama import OllamaLLM
 from langchain_core.prompts import ChatPromptTemplate
 
+from resume_scraper import llm_client
+from resume_scraper.llm_cache import get_llm_cache
+
 # --- Configuration ---
 # IMPORTANT: SET YOUR CHROMEDRIVER PATH HERE!
 # Example: CHROMEDRIVER_PATH = "./chromedriver" (if in the same directory as this script)
@@ -117,10 +119,10 @@ LLM_PROMPT_TEMPLATE = (
     "4. **Direct Data Only:** Your output should contain only the data that is explicitly requested, with no other text."
 )
 
-# Initialize the Ollama LLM model.
+# The Ollama model is chosen by the "page_parsing" route in resume_scraper/llm_client.py
+# (small model first, escalating to the larger one on an error).
 # Ensure your Ollama server is running (e.g., `ollama serve` in a terminal)
-# and you have the 'llama3' model pulled (`ollama pull llama3`).
-ollama_model = OllamaLLM(model="llama3.2")
+# and you have the routed models pulled (`ollama pull llama3.2:1b`, `ollama pull llama3.2`).
 
 def parse_with_ollama(dom_chunks, parse_description):
     """
@@ -128,7 +130,6 @@ def parse_with_ollama(dom_chunks, parse_description):
     Iterates through chunks, sending each to the LLM.
     """
     prompt = ChatPromptTemplate.from_template(LLM_PROMPT_TEMPLATE)
-    chain = prompt | ollama_model
 
     parsed_results = []
     print(f"🧠 Starting Ollama parsing for {len(dom_chunks)} chunks...")
@@ -138,12 +139,14 @@ def parse_with_ollama(dom_chunks, parse_description):
         # or for more deliberate processing, especially with external APIs.
         # time.sleep(0.3)
 
-        response = chain.invoke(
+        prompt_value = prompt.invoke(
             {"dom_content": chunk, "parse_description": parse_description}
         )
+        # Cached by rendered prompt, so re-running on an unchanged page costs nothing
+        response = llm_client.invoke("page_parsing", prompt_value.to_string())
         parsed_results.append(response.strip()) # .strip() removes leading/trailing whitespace
 
-    print("✅ Ollama parsing complete.")
+    print(f"✅ Ollama parsing complete. (LLM cache: {get_llm_cache().stats()['hit_rate']:.0%} hit rate)")
     # Filter out any empty responses (e.g., if a chunk had no relevant info)
     # and join the valid results with newlines.
     return "\n".join(filter(None, parsed_results))
@@ -158,7 +161,7 @@ def main():
     print("\n--- AI Web Scraper (Command Line Interface) ---")
     print("-----------------------------------------------")
     print(f"Using ChromeDriver from: {CHROMEDRIVER_PATH}")
-    print("Ensure Ollama server is running with 'llama3' model.")
+    print(f"Ensure Ollama server is running with the '{llm_client.get_route('page_parsing')['model']}' model.")
     print("-----------------------------------------------")
 
     # Step 1: Get URL input from the user